@@ -1,42 +1,44 @@
 # app.py
-import os, sys, subprocess
-from datetime import datetime
-from flask import Flask, render_template, jsonify, request
-from services import get_top
+import os, sys, subprocess, json, threading, time, sqlite3, pathlib
+from datetime import datetime, timedelta
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
+from services import get_top, letter_stats, player_progress, search_top, scores_version
 from services import save_score  # si lo necesitás en el futuro
+from supervisor import GameSupervisor
+import models
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 GAME_SCRIPT = os.path.join(BASE_DIR, "tpi_juego.py")
 
 app = Flask(__name__)
-game_proc = None
+
+STREAM_POLL = 0.5        # cada cuánto mira el vigía si cambió scores_version (ver _watch_scores)
+STREAM_KEEPALIVE = 15.0  # comentario vacío para detectar clientes que se fueron
+_changes = threading.Condition()  # despierta a los streams: cambió scores o el juego arrancó / se detuvo
+_generation = [0]                 # sube con cada notify_change (para no perder avisos entre consultas)
+
+def notify_change():
+    with _changes:
+        _generation[0] += 1
+        _changes.notify_all()
 
 # --- Control de juego ---
+# El supervisor lanza tpi_juego.py, recibe sus latidos (FPS, latencia por etapa, estado)
+# y lo relanza si se cae; ver supervisor.py
+supervisor = GameSupervisor(
+    [sys.executable, GAME_SCRIPT], cwd=BASE_DIR,
+    creationflags=subprocess.CREATE_NEW_CONSOLE if os.name == "nt" else 0,
+    on_change=notify_change,
+)
+
 def is_game_running():
-    global game_proc
-    return (game_proc is not None) and (game_proc.poll() is None)
+    return supervisor.running()
 
 def start_game():
-    global game_proc
-    if is_game_running():
-        return False, "El juego ya está corriendo."
-    py = sys.executable
-    creationflags = subprocess.CREATE_NEW_CONSOLE if os.name == "nt" else 0
-    try:
-        game_proc = subprocess.Popen([py, GAME_SCRIPT], cwd=BASE_DIR, creationflags=creationflags)
-        return True, "Juego iniciado."
-    except Exception as e:
-        return False, f"No se pudo iniciar: {e}"
+    return supervisor.start()
 
 def stop_game():
-    global game_proc
-    if not is_game_running():
-        return False, "No hay juego corriendo."
-    try:
-        game_proc.terminate()
-        return True, "Juego detenido."
-    except Exception as e:
-        return False, f"Error al detener: {e}"
+    return supervisor.stop()
 
 # --- Rutas ---
 @app.route("/")
@@ -47,12 +49,162 @@ def home():
 @app.route("/api/top")
 def api_top():
     limit = int(request.args.get("limit", 20))
-    q = (request.args.get("q") or "").strip().lower()
-    rows = get_top(limit*3)
-    if q:
-        rows = [r for r in rows if q in (r[0] or "").lower()]
-    rows = rows[:limit]
-    return jsonify({"rows": rows, "running": is_game_running()})
+    q = (request.args.get("q") or "").strip()
+    compact = request.args.get("format") == "compact"
+    running = is_game_running()
+
+    # ETag = versión de la tabla scores + estado del juego: si el cliente ya los tiene,
+    # se contesta 304 sin consultar ni serializar nada
+    version = scores_version()
+    etag = f"{version}-{int(running)}-{'c' if compact else 'f'}"
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"', "Cache-Control": "no-cache"})
+
+    try:
+        # búsqueda y paginado en SQL: exactamente `limit` filas + cursor de la siguiente página
+        rows, next_cursor = search_top(limit, q, request.args.get("cursor"), epoch=compact)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if compact:
+        # [[nombre, puntaje, epoch], ...] sin espacios
+        body = json.dumps({"v": version, "rows": rows, "next": next_cursor, "running": running},
+                          separators=(",", ":"), ensure_ascii=False)
+        resp = Response(body, mimetype="application/json")
+    else:
+        resp = jsonify({"rows": rows, "next": next_cursor, "running": running})
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+@app.route("/api/player/<name>")
+def api_player(name):
+    try:
+        days = min(max(int(request.args.get("days", 30)), 1), 365)
+    except ValueError:
+        return jsonify({"error": "days debe ser un número"}), 400
+    # mismo ETag que /api/top: mientras scores no cambie, el resumen tampoco
+    etag = f"p{scores_version()}-{days}"
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"', "Cache-Control": "no-cache"})
+    data = player_progress(name, days)
+    if data is None:
+        return jsonify({"error": f"sin partidas de {name!r}"}), 404
+    resp = jsonify(data)
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+@app.route("/api/letters")
+def api_letters():
+    """Telemetría por letra (las más lentas primero), para ajustar K / LETTER_K del juego."""
+    days = request.args.get("days")
+    try:
+        since = datetime.now() - timedelta(days=int(days)) if days else None
+    except ValueError:
+        return jsonify({"error": "days debe ser un número"}), 400
+    return jsonify({"letters": letter_stats(since)})
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _read_version(path):
+    # conexión de solo lectura a `path`: nunca crea ni migra la base (get_engine() sí lo haría)
+    conn = sqlite3.connect(pathlib.Path(path).as_uri() + "?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT version FROM scores_version WHERE id = 1").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else 0
+
+def _watch_scores(path, stop):
+    # un solo hilo por base para todos los streams: lee scores_version (una fila) y despierta a los
+    # streams cuando cambia; los streams no consultan la base mientras no cambie
+    last = None
+    while not stop.is_set():
+        try:
+            version = _read_version(path)
+        except sqlite3.Error:
+            version = last
+        if version != last:
+            last = version
+            notify_change()
+        stop.wait(_watcher["poll"])
+
+_watcher = {"path": None, "stop": None, "poll": STREAM_POLL}
+_watcher_lock = threading.Lock()
+
+def _ensure_watcher(poll):
+    """Arranca el vigía de la base actual (models.DB_PATH); si la base cambió, frena el anterior."""
+    with _watcher_lock:
+        _watcher["poll"] = poll
+        if _watcher["path"] != models.DB_PATH:
+            _stop_watcher_locked()
+            stop = threading.Event()
+            _watcher.update(path=models.DB_PATH, stop=stop)
+            threading.Thread(target=_watch_scores, args=(models.DB_PATH, stop), name="scores-watch", daemon=True).start()
+
+def _stop_watcher_locked():
+    if _watcher["stop"] is not None:
+        _watcher["stop"].set()
+    _watcher.update(path=None, stop=None)
+
+def stop_watcher():
+    """Frena el vigía de scores (tests, o antes de models.configure())."""
+    with _watcher_lock:
+        _stop_watcher_locked()
+
+def _rows_diff(old, new):
+    """Filas que cambiaron ([índice, fila]) y el largo nuevo de la página."""
+    changed = [[i, row] for i, row in enumerate(new) if i >= len(old) or old[i] != row]
+    return {"set": changed, "len": len(new)}
+
+def leaderboard_events(limit, q, poll=STREAM_POLL, keepalive=STREAM_KEEPALIVE):
+    """Eventos SSE: 'top' con la página completa al conectarse, 'diff' con solo las filas que cambiaron
+       y 'status' cuando el juego arranca o termina. Entre cambios el stream duerme: lo despierta
+       notify_change() (el hilo que vigila scores_version o el supervisor del juego).
+    """
+    _ensure_watcher(poll)
+    last_rows = last_running = last_version = None
+    last_sent = time.monotonic()
+    while True:
+        with _changes:
+            seen = _generation[0]
+        version = scores_version()
+        if version != last_version:
+            last_version = version
+            rows, _ = search_top(limit, q)   # desde top_cache: N streams, una sola consulta
+            if last_rows is None:
+                last_sent = time.monotonic()
+                yield _sse("top", {"rows": rows})
+            elif rows != last_rows:
+                last_sent = time.monotonic()
+                yield _sse("diff", _rows_diff(last_rows, rows))
+            last_rows = rows
+        running = is_game_running()
+        if running != last_running:
+            last_running = running
+            last_sent = time.monotonic()
+            yield _sse("status", {"running": running})
+        if time.monotonic() - last_sent >= keepalive:
+            last_sent = time.monotonic()
+            yield ": keepalive\n\n"
+        with _changes:
+            if _generation[0] == seen:
+                _changes.wait(max(0.0, keepalive - (time.monotonic() - last_sent)))
+
+@app.route("/api/stream")
+def api_stream():
+    limit = int(request.args.get("limit", 20))
+    q = (request.args.get("q") or "").strip()
+    return Response(stream_with_context(leaderboard_events(limit, q)), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/api/status")
+def api_status():
+    """Salud del juego: corriendo, FPS, latencia por etapa, tiempo de arranque, caídas y relanzamientos."""
+    resp = jsonify(supervisor.status())
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
 
 @app.route("/api/play", methods=["POST"])
 def api_play():
@@ -0,0 +1,147 @@
+# Tests de la API del leaderboard (base temporal, sin levantar el servidor)
+
+import json
+import sqlite3
+import time
+
+import pytest
+
+import app
+import models
+import services
+
+
+@pytest.fixture
+def db(tmp_path):
+    original = models.DB_PATH
+    models.configure(str(tmp_path / "test.db"))
+    yield
+    app.stop_watcher()
+    models.configure(original)
+
+
+def test_api_top_filtra_y_pagina(db):
+    services.save_scores([("ana", 5), ("anabel", 9), ("beto", 7)])
+    client = app.app.test_client()
+    data = client.get("/api/top?limit=1&q=AN").get_json()
+    assert [r[0] for r in data["rows"]] == ["anabel"] and data["next"]
+    data = client.get(f"/api/top?limit=1&q=AN&cursor={data['next']}").get_json()
+    assert [r[0] for r in data["rows"]] == ["ana"] and data["next"] is None
+    assert client.get("/api/top?cursor=xx").status_code == 400
+
+
+def test_api_top_limit_cero_devuelve_lista_vacia(db):
+    services.save_scores([("ana", 5), ("beto", 7)])
+    client = app.app.test_client()
+    for limit in (0, -3):
+        res = client.get(f"/api/top?limit={limit}")
+        assert res.status_code == 200
+        assert res.get_json()["rows"] == [] and res.get_json()["next"] is None
+    assert services.search_top(0) == ([], None)
+
+
+def _event(chunk):
+    event, data = chunk.strip().split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+def _next_event(stream):
+    # salta los keepalive mientras el vigía nota el cambio
+    chunk = next(stream)
+    while chunk.startswith(":"):
+        chunk = next(stream)
+    return _event(chunk)
+
+
+def test_stream_manda_el_top_solo_cuando_cambia(db):
+    services.save_score("ana", 5)
+    stream = app.leaderboard_events(10, "", poll=0.01, keepalive=0.05)
+    event, data = _event(next(stream))
+    rows = services.search_top(10)[0]
+    assert event == "top" and [tuple(r) for r in data["rows"]] == rows
+    assert _event(next(stream)) == ("status", {"running": False})
+    assert next(stream) == ": keepalive\n\n"       # sin cambios: nada más que keepalive
+
+    conn = sqlite3.connect(models.DB_PATH)          # el juego guarda desde otro proceso
+    conn.execute("INSERT INTO scores (name, score, created_at) VALUES ('juego', 9, '2025-01-01 10:00:00.000000')")
+    conn.commit()
+    conn.close()
+    event, data = _next_event(stream)                # solo las filas que cambiaron
+    assert event == "diff" and data == {"set": [[0, ["juego", 9, "01/01/2025 10:00:00"]], [1, list(rows[0])]], "len": 2}
+
+    services.save_score("zoe", 1)                    # entra al final: una sola fila
+    event, data = _next_event(stream)
+    assert event == "diff" and [i for i, _ in data["set"]] == [2] and data["len"] == 3
+
+
+def test_vigia_no_crea_ni_migra_la_base(tmp_path):
+    original = models.DB_PATH
+    models.configure(str(tmp_path / "no-existe.db"))
+    try:
+        app._ensure_watcher(0.01)
+        time.sleep(0.1)
+        assert not (tmp_path / "no-existe.db").exists()   # solo lectura: no la crea
+    finally:
+        app.stop_watcher()
+        models.configure(original)
+    assert app._watcher["path"] is None
+
+
+def test_stream_endpoint_es_event_stream(db):
+    res = app.app.test_client().get("/api/stream?limit=5", buffered=False)
+    assert res.mimetype == "text/event-stream"
+    assert next(res.response).startswith(b"event: top")
+    res.close()
+
+
+def test_api_top_etag_y_304(db):
+    client = app.app.test_client()
+    services.save_score("ana", 5)
+    first = client.get("/api/top?limit=5")
+    etag = first.headers["ETag"]
+    again = client.get("/api/top?limit=5", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+
+    conn = sqlite3.connect(models.DB_PATH)   # el juego guarda desde otro proceso
+    conn.execute("INSERT INTO scores (name, score, created_at) VALUES ('juego', 9, '2025-01-01 10:00:00.000000')")
+    conn.commit()
+    conn.close()
+    changed = client.get("/api/top?limit=5", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert [r[0] for r in changed.get_json()["rows"]] == ["juego", "ana"]
+
+
+def test_api_top_compacto_con_epoch(db):
+    services.save_score("ana", 5)
+    res = app.app.test_client().get("/api/top?format=compact")
+    data = res.get_json()
+    assert b" " not in res.data
+    assert data["v"] == services.scores_version() and data["running"] is False
+    [[name, score, ts]] = data["rows"]
+    assert (name, score) == ("ana", 5) and isinstance(ts, int) and abs(ts - time.time()) < 60
+
+
+def test_api_player(db):
+    services.save_scores([("ana", 5), ("ana", 9)])
+    client = app.app.test_client()
+    res = client.get("/api/player/ana?days=7")
+    data = res.get_json()
+    assert (data["games"], data["best"], data["average"]) == (2, 9, 7.0)
+    assert len(data["days"]) == 1
+    assert client.get("/api/player/ana?days=7", headers={"If-None-Match": res.headers["ETag"]}).status_code == 304
+    assert client.get("/api/player/nadie").status_code == 404
+    assert client.get("/api/player/ana?days=x").status_code == 400
+
+
+def test_api_letters(db):
+    services.save_attempts([("ana", 1e9, "CASA", "C", "hit", 0.5, 0), ("ana", 1e9, "CASA", "A", "hit", 1.5, 2)])
+    client = app.app.test_client()
+    assert [r["letter"] for r in client.get("/api/letters").get_json()["letters"]] == ["A", "C"]
+    assert client.get("/api/letters?days=1").get_json()["letters"] == []
+    assert client.get("/api/letters?days=x").status_code == 400
+
+
+def test_api_status_sin_juego():
+    data = app.app.test_client().get("/api/status").get_json()
+    assert data["running"] is False and data["healthy"] is False
+    assert data["restarts"] == 0 and data["crashes"] == []
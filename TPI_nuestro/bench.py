@@ -0,0 +1,207 @@
+# bench.py
+# Benchmarks de los caminos calientes (reconocimiento + juego) con baselines
+# Uso: python bench.py                 -> mide y compara contra bench_baseline.json (exit 1 si hay regresión)
+#      python bench.py --save          -> guarda lo medido como nuevo baseline
+#      python bench.py --recording X   -> usa landmarks grabados (replay.py) en vez de sintéticos
+#
+# Es un chequeo MANUAL, no un gate: los µs de bench_baseline.json son absolutos y solo valen
+# en la máquina donde se guardaron (y con la misma carga). Para comparar un cambio:
+#   python bench.py --save   (en el commit anterior)  ->  python bench.py   (con el cambio)
+# en la misma máquina. Los tests (bench_test.py) solo verifican que el harness corre y
+# que la comparación funciona; no fallan por lentitud.
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+import tpi_juego as G
+from hand_corpus import landmark_corpus
+from replay import load_recording
+from tpi_letras import FRAME_HAND, Debouncer, analyze_z_pattern, bbox_from_landmarks, classify_letter
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BASE_DIR, "bench_baseline.json")
+W, H = 1920, 1080
+TOLERANCE = 0.5   # +50% de latencia / memoria sobre el baseline se considera regresión
+
+# -------------------- Entradas --------------------
+def synthetic_hands(n=500):
+    """Manos sintéticas reproducibles: [(hand_landmarks, scale_h, wrist_y)]."""
+    return [(hand, scale_h * H // 720, wrist_y * H // 720) for hand, scale_h, wrist_y in landmark_corpus(n=n, seed=99)]
+
+def recorded_hands(path):
+    """Manos de una grabación (solo frames con mano), en el mismo formato que synthetic_hands()."""
+    rec_w, rec_h, records = load_recording(path)
+    hands = []
+    for rec in records[records["kind"] == FRAME_HAND]:
+        pts = rec["pts"].tolist()
+        lm = SimpleNamespace(landmark=[SimpleNamespace(x=x / rec_w, y=y / rec_h, z=0.0) for x, y in pts])
+        ys = [int(y * H / rec_h) for _, y in pts]
+        hands.append((lm, max(1, max(ys) - min(ys)), ys[0]))
+    if not hands:
+        raise ValueError(f"{path}: la grabación no tiene frames con mano")
+    return hands
+
+def z_stroke(roi):
+    """Trazo en Z dentro del ROI (18 puntos)."""
+    x1, y1, x2, y2 = roi
+    corners = ((x1 + 20, y1 + 20), (x2 - 20, y1 + 20), (x1 + 20, y2 - 20), (x2 - 20, y2 - 20))
+    points = []
+    for (ax, ay), (bx, by) in zip(corners, corners[1:]):
+        points += [(ax + (bx - ax) * k // 6, ay + (by - ay) * k // 6) for k in range(6)]
+    return points
+
+# -------------------- Benchmarks --------------------
+# Cada benchmark recibe la lista de manos y devuelve la función (sin argumentos) a medir.
+BENCHES = {}
+
+def bench(name):
+    def register(setup):
+        BENCHES[name] = setup
+        return setup
+    return register
+
+@bench("classify_letter")
+def _classify_letter(hands):
+    it = itertools.cycle(hands)
+
+    def call():
+        lm, scale_h, wrist_y = next(it)
+        return classify_letter(lm, W, H, scale_h, wrist_y)
+    return call
+
+@bench("bbox_from_landmarks")
+def _bbox(hands):
+    it = itertools.cycle([h[0] for h in hands])
+    shape = (H, W, 3)
+    return lambda: bbox_from_landmarks(shape, next(it))
+
+@bench("analyze_z_pattern")
+def _analyze_z(hands):
+    roi = (W - W // 4 - 20, 20, W - 20, int(H * 0.35) + 20)
+    points = z_stroke(roi)
+    roi_w, roi_h = roi[2] - roi[0], roi[3] - roi[1]
+    return lambda: analyze_z_pattern(points, roi_w, roi_h, roi)
+
+@bench("Debouncer.push")
+def _debouncer(hands):
+    labels = itertools.cycle(["A", "A", "", "B", "A", "C", "A", ""])
+    deb = Debouncer(window=7)
+    return lambda: deb.push(next(labels))
+
+@bench("Debouncer.push w60")
+def _debouncer_w60(hands):
+    labels = itertools.cycle(["A", "A", "", "B", "A", "C", "A", ""])
+    deb = Debouncer(window=60)
+    return lambda: deb.push(next(labels))
+
+@bench("draw_hud")
+def _draw_hud(hands):
+    # estado estable: las capas cacheadas se re-renderizan solo cuando cambia el contenido
+    img = np.zeros((H, W, 3), np.uint8)
+    return lambda: G.draw_hud(img, "CAMION", 1, 1500, 42.0, 1.3, "A")
+
+@bench("draw_end_menu")
+def _draw_end_menu(hands):
+    img = np.zeros((H, W, 3), np.uint8)
+    rows = [(f"jugador{i}", 2000 - 37 * i, "01/01/2025 12:00:00") for i in range(G.TOP_LIMIT)]
+    return lambda: G.draw_end_menu(img, 1234, "jugador", rows)
+
+@bench("play_step")
+def _play_step(hands):
+    # bloque de puntaje de PLAY con etiquetas reales del clasificador
+    labels = [classify_letter(lm, W, H, s, wy) for lm, s, wy in hands]
+    it = itertools.cycle(labels)
+    gs = G.reset_game_state("bench", now=0.0)
+    clock = itertools.count(0.0, 1 / 30)
+    return lambda: G.play_step(gs, next(it), now=next(clock))
+
+# -------------------- Medición --------------------
+def measure(fn, min_time=0.2, repeat=5):
+    """Latencia por llamada (mediana de `repeat` tandas, en µs) y pico de memoria de una llamada (bytes)."""
+    fn()  # warmup (caches de capas / tablas)
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        dt = time.perf_counter() - t0
+        if dt >= min_time / repeat:
+            break
+        number *= 2
+    per_call = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - t0) / number)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"us": statistics.median(per_call) * 1e6, "alloc_bytes": peak}
+
+def run(hands, names=None, min_time=0.2):
+    return {name: measure(BENCHES[name](hands), min_time=min_time) for name in (names or BENCHES)}
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    """Lista de (benchmark, métrica, medido, baseline) que superan el baseline en más de `tolerance`."""
+    found = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if res["us"] > base["us"] * (1 + tolerance):
+            found.append((name, "us", res["us"], base["us"]))
+        # margen fijo para el ruido de tracemalloc en llamadas que casi no alocan
+        if res["alloc_bytes"] > base["alloc_bytes"] * (1 + tolerance) + 256:
+            found.append((name, "alloc_bytes", res["alloc_bytes"], base["alloc_bytes"]))
+    return found
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmarks de reconocimiento y juego")
+    ap.add_argument("--save", action="store_true", help="guardar los resultados como baseline")
+    ap.add_argument("--recording", help="grabación de landmarks (replay.py) para usar como entrada")
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE)
+    ap.add_argument("--min-time", type=float, default=0.2, help="segundos de medición por benchmark")
+    ap.add_argument("names", nargs="*", help="benchmarks a correr (default: todos)")
+    args = ap.parse_args(argv)
+
+    hands = recorded_hands(args.recording) if args.recording else synthetic_hands()
+    results = run(hands, args.names, min_time=args.min_time)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"{'benchmark':<22}{'µs/llamada':>12}{'baseline':>12}{'alloc B':>10}{'baseline':>10}")
+    for name, res in results.items():
+        base = baseline.get(name, {})
+        print(f"{name:<22}{res['us']:>12.2f}{base.get('us', float('nan')):>12.2f}"
+              f"{res['alloc_bytes']:>10}{base.get('alloc_bytes', '-'):>10}")
+
+    if args.save:
+        baseline.update({name: {"us": round(r["us"], 3), "alloc_bytes": r["alloc_bytes"]} for name, r in results.items()})
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"baseline guardado en {args.baseline}")
+        return 0
+
+    found = regressions(results, baseline, args.tolerance)
+    for name, metric, value, base in found:
+        print(f"REGRESIÓN {name}: {metric} {value:.1f} > {base:.1f} (+{args.tolerance:.0%})")
+    return 1 if found else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
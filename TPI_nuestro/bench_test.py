@@ -0,0 +1,25 @@
+# Tests del harness de benchmarks (no miden nada: solo que corre y que compara bien;
+# la comparación contra bench_baseline.json es manual, ver bench.py)
+
+import json
+
+import bench
+
+
+def test_todos_los_benchmarks_corren():
+    results = bench.run(bench.synthetic_hands(n=20), min_time=0.001)
+    assert set(results) == set(bench.BENCHES)
+    assert all(r["us"] > 0 and r["alloc_bytes"] >= 0 for r in results.values())
+
+
+def test_regresiones_contra_baseline():
+    baseline = {"a": {"us": 10.0, "alloc_bytes": 1000}, "b": {"us": 10.0, "alloc_bytes": 0}}
+    results = {"a": {"us": 14.0, "alloc_bytes": 1400}, "b": {"us": 16.0, "alloc_bytes": 5000},
+               "nuevo": {"us": 1e6, "alloc_bytes": 1e9}}
+    assert bench.regressions(results, baseline, tolerance=0.5) == [
+        ("b", "us", 16.0, 10.0), ("b", "alloc_bytes", 5000, 0)]
+
+
+def test_baseline_guardado_tiene_todos_los_benchmarks():
+    with open(bench.BASELINE_PATH) as f:
+        assert set(json.load(f)) == set(bench.BENCHES)
@@ -0,0 +1,64 @@
+# hand_corpus.py
+# Manos sintéticas reproducibles (landmarks como los de MediaPipe) para tests y benchmarks
+
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+from tpi_letras import landmarks_to_px
+
+W, H = 1280, 720   # tamaño de cámara con el que se calculan scale_h y wrist_y
+
+
+def _fake_hand(points):
+    return SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=0.0) for x, y in points])
+
+
+def _random_pose(rng):
+    """Mano plausible: cada dedo extendido o flexionado, pulgar en cualquier lado."""
+    size = rng.uniform(0.15, 0.45)
+    cx, cy = rng.uniform(0.2, 0.8), rng.uniform(0.3, 0.8)
+    tilt = rng.uniform(-1.2, 1.2)
+    pts = [(0.0, 0.0)] * 21
+    pts[0] = (cx, cy + size * 0.5)
+    # pulgar: base y punta libres (cerca de la palma la mayoría de las veces)
+    for j in (1, 2, 3):
+        pts[j] = (cx - size * 0.25 * j / 3, cy + size * (0.4 - 0.15 * j))
+    for f, base_x in enumerate((-0.15, -0.05, 0.05, 0.15)):
+        mcp, pip, dip, tip = 5 + 4 * f, 6 + 4 * f, 7 + 4 * f, 8 + 4 * f
+        bx = cx + base_x * size
+        pts[mcp] = (bx, cy)
+        ext = rng.random() < 0.5
+        dx = np.sin(tilt) * size * 0.2
+        dy = -np.cos(tilt) * size * 0.2
+        pts[pip] = (bx + dx, cy + dy)
+        if ext:
+            pts[dip] = (bx + 1.5 * dx, cy + 1.5 * dy)
+            pts[tip] = (bx + 2.0 * dx + rng.gauss(0, size * 0.05), cy + 2.0 * dy + rng.gauss(0, size * 0.05))
+        else:
+            pts[dip] = (bx + dx * 0.8, cy + dy * 0.3)
+            pts[tip] = (bx + rng.gauss(0, size * 0.08), cy + abs(dy) * rng.uniform(-0.4, 0.6))
+    # punta del pulgar cerca de algún landmark (o suelta)
+    ax, ay = pts[rng.choice((0, 5, 6, 8, 10, 12, 16))]
+    spread = rng.choice((0.05, 0.2, 0.5, 1.0))
+    pts[4] = (ax + rng.gauss(0, size * spread), ay + rng.gauss(0, size * spread))
+    return [(x + rng.gauss(0, 0.004), y + rng.gauss(0, 0.004)) for x, y in pts]
+
+
+def landmark_corpus(n=4000, seed=1234):
+    """Lista de (hand_landmarks, scale_h, wrist_y) reproducible."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n):
+        if i % 4 == 0:
+            # puntos totalmente aleatorios en una caja (casos raros / fuera de imagen)
+            cx, cy, size = rng.uniform(-0.1, 1.1), rng.uniform(-0.1, 1.1), rng.uniform(0.0, 0.3)
+            pts = [(cx + rng.uniform(0, size), cy + rng.uniform(0, size)) for _ in range(21)]
+        else:
+            pts = _random_pose(rng)
+        hand = _fake_hand(pts)
+        px = landmarks_to_px(hand, W, H)
+        scale_h = max(1, int(px[:, 1].max() - px[:, 1].min()))
+        corpus.append((hand, scale_h, int(px[0, 1])))
+    return corpus
@@ -1,15 +1,18 @@
 # models.py
-from sqlalchemy import create_engine, Column, Integer, String, DateTime
+# Capa de datos compartida por app.py y tpi_juego.py (los dos procesos usan scores.db a la vez)
+from sqlalchemy import create_engine, event, text, Column, Integer, Float, String, DateTime, Index
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import QueuePool
+from contextlib import contextmanager
 from datetime import datetime
 import os
+import threading
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "scores.db")
 
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
 Base = declarative_base()
-SessionLocal = sessionmaker(bind=engine)
+SessionLocal = sessionmaker()   # se enlaza al engine la primera vez que se usa (get_session)
 
 class Score(Base):
     __tablename__ = "scores"
@@ -18,4 +21,185 @@ class Score(Base):
     score = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.now)
 
-Base.metadata.create_all(engine)
+    __table_args__ = (
+        # mismo orden que el leaderboard (get_top) + name: la consulta se resuelve
+        # recorriendo solo el índice, sin leer la tabla ni ordenar
+        Index("ix_scores_top", score.desc(), created_at, name),
+        # búsqueda por nombre (services.search_top con pocos partidos que coinciden): cada
+        # jugador es un rango del índice, ya en el orden del leaderboard
+        Index("ix_scores_name_top", name, score.desc(), created_at, id),
+    )
+
+class ScoresVersion(Base):
+    """Una sola fila: la versión de la tabla scores. La suben triggers de SQLite en cada
+       insert/update/delete, así cuenta también lo que escribe otro proceso (juego / web)."""
+    __tablename__ = "scores_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class PlayerStats(Base):
+    """Rollup por jugador (CU06): lo mantienen triggers sobre scores, no hace falta recorrer la tabla."""
+    __tablename__ = "player_stats"
+    name = Column(String(30), primary_key=True)
+    games = Column(Integer, nullable=False)
+    total = Column(Integer, nullable=False)
+    best = Column(Integer, nullable=False)
+    first_at = Column(DateTime)
+    last_at = Column(DateTime)
+
+class PlayerDaily(Base):
+    """Rollup por jugador y día (day = 'aaaa-mm-dd'), para la evolución."""
+    __tablename__ = "player_daily"
+    name = Column(String(30), primary_key=True)
+    day = Column(String(10), primary_key=True)
+    games = Column(Integer, nullable=False)
+    total = Column(Integer, nullable=False)
+    best = Column(Integer, nullable=False)
+
+class LetterAttempt(Base):
+    """Telemetría: un intento por letra pedida (confirmada o salteada), para ajustar umbrales.
+       El juego los junta en memoria y los guarda en tandas (services.save_attempts)."""
+    __tablename__ = "letter_attempts"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(30), nullable=False)
+    word = Column(String(30), nullable=False)
+    letter = Column(String(1), nullable=False)
+    outcome = Column(String(4), nullable=False)        # "hit" | "skip"
+    elapsed = Column(Float, nullable=False)            # segundos desde la letra anterior
+    misses = Column(Integer, nullable=False)           # etiquetas equivocadas que bajaron el combo
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_letter_attempts_letter", letter, created_at),
+    )
+
+_VERSION_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS scores_version_{op.lower()} AFTER {op} ON scores "
+    f"BEGIN UPDATE scores_version SET version = version + 1 WHERE id = 1; END"
+    for op in ("INSERT", "UPDATE", "DELETE")
+]
+
+# Alta: suma incremental. Baja / cambio (la app no los hace): se recalcula el jugador desde scores.
+_ROLLUP_UPSERT = """
+    INSERT INTO player_stats (name, games, total, best, first_at, last_at)
+    VALUES (NEW.name, 1, NEW.score, NEW.score, NEW.created_at, NEW.created_at)
+    ON CONFLICT (name) DO UPDATE SET games = games + 1, total = total + excluded.total,
+        best = max(best, excluded.best), first_at = min(first_at, excluded.first_at), last_at = max(last_at, excluded.last_at);
+    INSERT INTO player_daily (name, day, games, total, best)
+    VALUES (NEW.name, substr(NEW.created_at, 1, 10), 1, NEW.score, NEW.score)
+    ON CONFLICT (name, day) DO UPDATE SET games = games + 1, total = total + excluded.total, best = max(best, excluded.best);
+"""
+
+def _rollup_rebuild(where):
+    return f"""
+    DELETE FROM player_stats WHERE {where};
+    DELETE FROM player_daily WHERE {where};
+    INSERT INTO player_stats (name, games, total, best, first_at, last_at)
+        SELECT name, count(*), sum(score), max(score), min(created_at), max(created_at) FROM scores
+        WHERE {where} GROUP BY name;
+    INSERT INTO player_daily (name, day, games, total, best)
+        SELECT name, substr(created_at, 1, 10), count(*), sum(score), max(score) FROM scores
+        WHERE {where} GROUP BY name, substr(created_at, 1, 10);
+"""
+
+_ROLLUP_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS player_rollup_insert AFTER INSERT ON scores BEGIN {_ROLLUP_UPSERT} END",
+    f"CREATE TRIGGER IF NOT EXISTS player_rollup_delete AFTER DELETE ON scores BEGIN {_rollup_rebuild('name = OLD.name')} END",
+    f"CREATE TRIGGER IF NOT EXISTS player_rollup_update AFTER UPDATE ON scores "
+    f"BEGIN {_rollup_rebuild('name IN (OLD.name, NEW.name)')} END",
+]
+
+# Triggers por fila que una carga masiva saca y reemplaza por un recálculo al final
+_INSERT_TRIGGERS = [("scores_version_insert", _VERSION_TRIGGERS[0]), ("player_rollup_insert", _ROLLUP_TRIGGERS[0])]
+
+@contextmanager
+def scores_bulk_load(conn):
+    """Carga masiva en scores dentro de la transacción de `conn`: sin los triggers de insert
+       (versión y rollups fila por fila); al salir recalcula los rollups de los jugadores cargados,
+       sube la versión una vez por fila y vuelve a crear los triggers. El DDL de SQLite es
+       transaccional: los demás procesos nunca ven la tabla sin triggers y si la carga falla
+       el rollback los deja como estaban.
+    """
+    if not conn.connection.dbapi_connection.in_transaction:
+        # pysqlite recién abre la transacción en el primer INSERT: sin esto el DROP TRIGGER
+        # quedaría confirmado aunque la carga falle. IMMEDIATE toma el lock de escritura ya.
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    first_id = conn.exec_driver_sql("SELECT coalesce(max(id), 0) FROM scores").scalar()
+    for name, _ in _INSERT_TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    yield
+    added = conn.exec_driver_sql("SELECT count(*) FROM scores WHERE id > ?", (first_id,)).scalar()
+    if added:
+        where = f"name IN (SELECT name FROM scores WHERE id > {int(first_id)})"
+        for stmt in _rollup_rebuild(where).split(";"):
+            if stmt.strip():
+                conn.exec_driver_sql(stmt)
+        conn.exec_driver_sql("UPDATE scores_version SET version = version + ? WHERE id = 1", (added,))
+    for _, ddl in _INSERT_TRIGGERS:
+        conn.exec_driver_sql(ddl)
+
+# === Engine perezoso ===
+_engine = None
+_engine_lock = threading.Lock()
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL: el juego escribe mientras la web lee sin bloquearse; busy_timeout espera
+    # en vez de fallar enseguida con "database is locked"
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA busy_timeout=5000")
+    cur.close()
+
+def get_engine():
+    """Crea el engine (pool de conexiones + WAL + tablas) la primera vez que se pide."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(
+                    f"sqlite:///{DB_PATH}", echo=False,
+                    poolclass=QueuePool, pool_size=4, max_overflow=4, pool_pre_ping=True,
+                    connect_args={"check_same_thread": False},  # hilos del juego / requests de Flask
+                )
+                event.listen(engine, "connect", _sqlite_pragmas)
+                Base.metadata.create_all(engine)
+                _migrate(engine)
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+def _migrate(engine):
+    # create_all no agrega índices a tablas que ya existían (scores.db viejos)
+    for index in Score.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT OR IGNORE INTO scores_version (id, version) VALUES (1, 0)"))
+        for ddl in _VERSION_TRIGGERS:
+            conn.execute(text(ddl))
+        # scores.db anterior a los rollups: se cargan una vez desde scores, junto con los triggers
+        has_rollup = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'player_rollup_insert'")).first()
+        if not has_rollup:
+            for stmt in _rollup_rebuild("1").split(";"):
+                if stmt.strip():
+                    conn.execute(text(stmt))
+            for ddl in _ROLLUP_TRIGGERS:
+                conn.execute(text(ddl))
+
+def get_session():
+    get_engine()
+    return SessionLocal()
+
+def init_db():
+    """Crea las tablas si no existen."""
+    get_engine()
+
+def configure(db_path):
+    """Apunta la capa de datos a otra base (tests, scripts); el engine se recrea al próximo uso."""
+    global DB_PATH, _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+        DB_PATH = db_path
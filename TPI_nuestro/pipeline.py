@@ -0,0 +1,126 @@
+# pipeline.py
+# Captura / inferencia / render en hilos separados para tpi_juego.py
+# Uso: pipe = FramePipeline(cap, engine).start(); label, annotated = pipe.get()
+
+import threading
+import time
+
+from tpi_letras import FramePool
+
+# -------------------- Slot "último gana" --------------------
+class LatestSlot:
+    """Cola acotada de 1 elemento: put() pisa lo que no se llegó a consumir."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0
+        self.dropped = 0
+
+    def put(self, item):
+        """Deja item en el slot; devuelve el elemento pisado (o None) para poder reciclarlo."""
+        with self._cond:
+            old = self._item
+            if old is not None:
+                self.dropped += 1
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+            return old
+
+    def get(self, timeout=None):
+        """Espera un elemento nuevo y lo saca del slot (None si vence el timeout)."""
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+# -------------------- Latencias por etapa --------------------
+class StageStats:
+    """Promedio móvil (EMA) de la latencia de cada etapa, en ms."""
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.ms = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        ms = seconds * 1000.0
+        with self._lock:
+            prev = self.ms.get(stage)
+            self.ms[stage] = ms if prev is None else prev + self.alpha * (ms - prev)
+
+    def snapshot(self):
+        """{etapa: ms} redondeado (para los latidos al supervisor)."""
+        with self._lock:
+            return {stage: round(ms, 2) for stage, ms in self.ms.items()}
+
+    def text(self, stages=("cap", "inf", "ui")):
+        with self._lock:
+            return "  ".join(f"{s} {self.ms[s]:.1f}ms" for s in stages if s in self.ms)
+
+# -------------------- Pipeline --------------------
+class FramePipeline:
+    """
+    Hilo de captura -> hilo de inferencia -> consumidor (render/UI en el hilo principal,
+    porque cv2.imshow/waitKey tienen que correr ahí). Entre etapas hay slots de 1
+    elemento donde gana el último frame, así el FPS queda limitado por la etapa más
+    lenta y no por la suma de todas.
+    """
+    def __init__(self, cap, engine):
+        self.cap = cap
+        self.engine = engine
+        self.frames = LatestSlot()   # captura -> inferencia
+        self.results = LatestSlot()  # inferencia -> render
+        self.capture_pool = FramePool()
+        self.stats = StageStats()
+        self.recognize = True        # lo actualiza el hilo principal según el estado del juego
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="captura", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inferencia", daemon=True),
+        ]
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.frames.put(None)
+        for t in self._threads:
+            t.join(timeout=1.0)
+
+    def get(self, timeout=0.1):
+        """Último (label, frame_anotado) listo, o None si no llegó nada nuevo.
+           El frame anotado se devuelve con engine.release_frame() después de mostrarlo.
+        """
+        return self.results.get(timeout)
+
+    def _capture_loop(self):
+        shape = None
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            # se lee directo sobre un buffer reciclado (cuando ya se conoce el tamaño)
+            buf = self.capture_pool.acquire(shape) if shape else None
+            ok, frame = self.cap.read(buf)
+            if not ok:
+                self.capture_pool.release(buf)
+                time.sleep(0.01)
+                continue
+            shape = frame.shape
+            self.stats.add("cap", time.perf_counter() - t0)
+            self.capture_pool.release(self.frames.put(frame))
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            frame = self.frames.get(timeout=0.1)
+            if frame is None:
+                continue
+            t0 = time.perf_counter()
+            result = self.engine.process_frame(frame, recognize=self.recognize)
+            self.capture_pool.release(frame)
+            self.stats.add("inf", time.perf_counter() - t0)
+            dropped = self.results.put(result)
+            if dropped is not None:
+                self.engine.release_frame(dropped[1])
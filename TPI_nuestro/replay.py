@@ -0,0 +1,62 @@
+# replay.py
+# Grabación de landmarks y replay determinístico de LetterEngine sin cámara ni MediaPipe
+# Uso (grabar):     engine.recorder = LandmarkRecorder("sesion.lmk", W, H)
+#     (reproducir): labels = replay("sesion.lmk")
+
+import struct
+
+import numpy as np
+
+from tpi_letras import LetterEngine, FRAME_HAND
+
+# Archivo: cabecera (magic, ancho, alto) + un registro de tamaño fijo por frame procesado
+MAGIC = b"LMK1"
+HEADER = struct.Struct("<4sHH")
+RECORD_DTYPE = np.dtype([
+    ("t", "<f8"),             # timestamp del frame (time.time() al grabar)
+    ("kind", "u1"),           # FRAME_IDLE / FRAME_SKIP / FRAME_NONE / FRAME_HAND
+    ("scale_h", "<u2"),       # alto de la mano en px (0 si no hay mano)
+    ("pts", "<i2", (21, 2)),  # landmarks en px (solo válidos con FRAME_HAND)
+])
+
+class LandmarkRecorder:
+    """Vuelca cada frame que pasa por LetterEngine.feed() a un archivo binario compacto."""
+    def __init__(self, path, W, H):
+        self._f = open(path, "wb")
+        self._f.write(HEADER.pack(MAGIC, W, H))
+        self._rec = np.zeros(1, RECORD_DTYPE)
+        self.frames = 0
+
+    def write(self, now, kind, pts=None, scale_h=0):
+        rec = self._rec
+        rec["t"] = now
+        rec["kind"] = kind
+        rec["scale_h"] = scale_h
+        rec["pts"] = pts if pts is not None else 0
+        self._f.write(rec.tobytes())
+        self.frames += 1
+
+    def close(self):
+        self._f.close()
+
+def load_recording(path):
+    """Lee una grabación -> (W, H, registros) con registros de dtype RECORD_DTYPE."""
+    with open(path, "rb") as f:
+        magic, W, H = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path}: no es una grabación de landmarks")
+        records = np.frombuffer(f.read(), dtype=RECORD_DTYPE)
+    return W, H, records
+
+def replay_frames(records, engine):
+    """Pasa los registros por engine.feed(); genera (t, label) por frame, a velocidad ilimitada."""
+    pts_all = records["pts"].astype(np.int64)  # una conversión para toda la grabación
+    for i, (t, kind) in enumerate(zip(records["t"].tolist(), records["kind"].tolist())):
+        pts = pts_all[i] if kind == FRAME_HAND else None
+        yield t, engine.feed(t, kind, pts)
+
+def replay(path, window=7):
+    """Reproduce una grabación con un LetterEngine sin MediaPipe y devuelve la lista de etiquetas."""
+    W, H, records = load_recording(path)
+    engine = LetterEngine(cam_w=W, cam_h=H, window=window, use_mediapipe=False)
+    return [label for _, label in replay_frames(records, engine)]
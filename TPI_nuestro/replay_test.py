@@ -0,0 +1,79 @@
+# Tests de grabación / replay de landmarks (sin cámara ni MediaPipe)
+
+import numpy as np
+import pytest
+
+from hand_corpus import W, H, landmark_corpus
+from replay import LandmarkRecorder, load_recording, replay
+from tpi_letras import FRAME_HAND, FRAME_IDLE, FRAME_NONE, FRAME_SKIP, LetterEngine, hand_features, landmarks_to_px
+
+
+def _poses():
+    return [landmarks_to_px(hand, W, H) for hand, _, _ in landmark_corpus(n=200, seed=7)]
+
+
+def _solo_indice(pts):
+    f = hand_features(pts, 100, pts[0][1])
+    return f.idx_ext and not (f.mid_ext or f.rng_ext or f.pky_ext)
+
+
+def _z_stroke(engine, poses):
+    """Frames de una Z trazada con el índice dentro del ROI y la salida del ROI."""
+    pose = next(p for p in poses if _solo_indice(p))
+    x1, y1, x2, y2 = engine.z_roi_bounds
+    a, b = (x1 + 20, y1 + 20), (x2 - 20, y1 + 20)
+    c, d = (x1 + 20, y2 - 20), (x2 - 20, y2 - 20)
+    path = []
+    for p0, p1 in ((a, b), (b, c), (c, d)):
+        path += [(p0[0] + (p1[0] - p0[0]) * k // 6, p0[1] + (p1[1] - p0[1]) * k // 6) for k in range(6)]
+    path.append((x1 - 60, y2 - 20))
+    return [pose + (np.array(tip) - pose[8]) for tip in path]
+
+
+def _session(engine, poses):
+    """Secuencia (t, kind, pts) con menús, manos sostenidas, frames salteados, sin mano y una Z."""
+    frames = [(FRAME_IDLE, None)] * 5
+    for pts in poses[:40]:
+        frames += [(FRAME_HAND, pts)] * 8 + [(FRAME_SKIP, None)] * 2
+        if pts[0, 0] % 5 == 0:
+            frames.append((FRAME_NONE, None))
+    frames += [(FRAME_HAND, pts) for pts in _z_stroke(engine, poses)]
+    return [(1000.0 + i / 30.0, kind, pts) for i, (kind, pts) in enumerate(frames)]
+
+
+def test_replay_reproduce_las_etiquetas_en_vivo(tmp_path):
+    path = str(tmp_path / "sesion.lmk")
+    live = LetterEngine(cam_w=W, cam_h=H, use_mediapipe=False)
+    live._ensure_roi(W, H)
+    live.recorder = LandmarkRecorder(path, W, H)
+    session = _session(live, _poses())
+    labels = [live.feed(t, kind, pts) for t, kind, pts in session]
+    live.recorder.close()
+
+    assert live.recorder.frames == len(session)
+    assert "Z" in labels
+    assert len(set(labels) - {""}) > 3
+    assert replay(path) == labels
+
+
+def test_grabacion_guarda_landmarks_y_escala(tmp_path):
+    path = str(tmp_path / "sesion.lmk")
+    pts = _poses()[1]
+    rec = LandmarkRecorder(path, W, H)
+    rec.write(12.5, FRAME_HAND, pts, 321)
+    rec.write(12.6, FRAME_NONE)
+    rec.close()
+
+    w, h, records = load_recording(path)
+    assert (w, h) == (W, H)
+    assert records["t"].tolist() == [12.5, 12.6]
+    assert records["kind"].tolist() == [FRAME_HAND, FRAME_NONE]
+    assert records["scale_h"].tolist() == [321, 0]
+    assert np.array_equal(records["pts"][0], pts)
+
+
+def test_load_recording_rechaza_otro_formato(tmp_path):
+    path = tmp_path / "otro.bin"
+    path.write_bytes(b"\x00" * 64)
+    with pytest.raises(ValueError):
+        load_recording(str(path))
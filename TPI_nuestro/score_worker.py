@@ -0,0 +1,132 @@
+# score_worker.py
+# Guardado de puntajes en segundo plano para tpi_juego.py
+# Uso: scores = ScoreWorker(save_scores, get_top20).start(); scores.submit(nombre, puntaje); scores.top_rows
+
+import queue
+import threading
+import time
+
+_REFRESH = object()   # pedido de solo releer el top
+_STOP = object()
+
+class _Attempts(list):
+    """Tanda de filas de telemetría (ver submit_attempts)."""
+
+def is_locked_error(exc):
+    """SQLite ocupado por otro proceso (app.py / otra instancia): vale la pena reintentar."""
+    return "database is locked" in str(exc)
+
+class ScoreWorker:
+    """
+    Hilo que recibe puntajes del loop del juego por una cola, los guarda en lote
+    (una transacción por tanda) y publica el top actualizado en `top_rows`.
+    Los reintentos por "database is locked" duermen en este hilo, nunca en el de render.
+    """
+    def __init__(self, save_batch, fetch_top, retries=5, retry_delay=0.05, batch_max=50, save_attempts=None):
+        self.save_batch = save_batch    # save_batch([(nombre, puntaje), ...])
+        self.fetch_top = fetch_top      # fetch_top() -> [(nombre, puntaje, fecha), ...]
+        self.save_attempts = save_attempts  # save_attempts([fila de telemetría, ...]) (opcional)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.batch_max = batch_max
+        self.top_rows = []              # último top publicado (lo lee el hilo del juego)
+        self.version = 0                # cambia cada vez que se publica un top nuevo
+        self.saved = 0
+        self.failed = 0
+        self.attempts_saved = 0
+        self.attempts_failed = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="puntajes", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self.refresh()
+        return self
+
+    def submit(self, name, score):
+        """Encola un puntaje; vuelve enseguida."""
+        self._queue.put((name, int(score)))
+
+    def submit_attempts(self, rows):
+        """Encola filas de telemetría; se guardan juntas en la próxima tanda (no relee el top)."""
+        if self.save_attempts is not None and rows:
+            self._queue.put(_Attempts(rows))
+
+    def refresh(self):
+        """Pide releer el top sin guardar nada."""
+        self._queue.put(_REFRESH)
+
+    def flush(self):
+        """Espera a que se procese todo lo encolado hasta ahora."""
+        self._queue.join()
+
+    def stop(self, timeout=2.0):
+        """Guarda lo pendiente y termina el hilo."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _retrying(self, fn, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                return fn(*args)
+            except Exception as e:
+                if not is_locked_error(e) or attempt == self.retries:
+                    raise
+                time.sleep(self.retry_delay * 2 ** attempt)
+
+    def _next_batch(self):
+        # espera el primer pedido y junta lo que ya esté encolado, hasta batch_max
+        items = [self._queue.get()]
+        while len(items) < self.batch_max:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _save_attempts_batch(self, attempts):
+        if not attempts:
+            return
+        try:
+            self._retrying(self.save_attempts, attempts)
+            self.attempts_saved += len(attempts)
+        except Exception as e:
+            # la telemetría no frena el guardado del puntaje
+            self.attempts_failed += len(attempts)
+            print(f"⚠️ Error al guardar telemetría: {e}")
+
+    def _save_scores(self, rows):
+        """Guarda una tanda de puntajes; False si falló (solo eso cuenta en `failed`)."""
+        if not rows:
+            return True
+        try:
+            self._retrying(self.save_batch, rows)
+        except Exception as e:
+            self.failed += len(rows)
+            print(f"⚠️ Error al guardar puntajes: {e}")
+            return False
+        self.saved += len(rows)
+        return True
+
+    def _publish_top(self):
+        try:
+            self.top_rows = self._retrying(self.fetch_top)
+        except Exception as e:
+            print(f"⚠️ Error al releer el top: {e}")   # queda el top anterior
+            return
+        self.version += 1
+
+    def _run(self):
+        stop = False
+        while not stop:
+            items = self._next_batch()
+            stop = _STOP in items
+            try:
+                self._save_attempts_batch([row for x in items if isinstance(x, _Attempts) for row in x])
+                rows = [x for x in items if x is not _REFRESH and x is not _STOP and not isinstance(x, _Attempts)]
+                saved = self._save_scores(rows)
+                if saved and not all(isinstance(x, _Attempts) for x in items):   # solo telemetría: el top no cambió
+                    self._publish_top()
+            finally:
+                for _ in items:
+                    self._queue.task_done()
@@ -0,0 +1,110 @@
+# Tests del guardado de puntajes en segundo plano (sin base: funciones falsas)
+
+import threading
+
+from score_worker import ScoreWorker
+
+
+class FakeDB:
+    def __init__(self, locked_times=0):
+        self.rows = []
+        self.batches = []
+        self.locked_times = locked_times
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def save(self, rows):
+        self.gate.wait()
+        if self.locked_times:
+            self.locked_times -= 1
+            raise RuntimeError("(sqlite3.OperationalError) database is locked")
+        self.batches.append(list(rows))
+        self.rows += rows
+
+    def top(self):
+        return sorted(self.rows, key=lambda r: -r[1])[:3]
+
+
+def test_guarda_en_lote_y_publica_el_top():
+    db = FakeDB()
+    worker = ScoreWorker(db.save, db.top).start()
+    worker.flush()
+    db.gate.clear()             # el primer guardado queda esperando: el resto se acumula
+    worker.submit("a", 10)
+    for i in range(5):
+        worker.submit(f"b{i}", 20 + i)
+    db.gate.set()
+    worker.flush()
+    assert worker.saved == 6 and worker.failed == 0
+    assert len(db.batches) <= 2
+    assert worker.top_rows == [("b4", 24), ("b3", 23), ("b2", 22)]
+    worker.stop()
+
+
+def test_reintenta_si_la_base_esta_bloqueada():
+    db = FakeDB(locked_times=3)
+    worker = ScoreWorker(db.save, db.top, retry_delay=0.001).start()
+    worker.submit("ana", 99)
+    worker.flush()
+    assert db.rows == [("ana", 99)] and worker.saved == 1
+    worker.stop()
+
+
+def test_otros_errores_no_se_reintentan_y_se_cuentan():
+    def boom(rows):
+        raise ValueError("otro error")
+    worker = ScoreWorker(boom, lambda: [], retry_delay=0.001).start()
+    worker.submit("x", 1)
+    worker.flush()
+    assert worker.failed == 1 and worker.saved == 0
+    worker.stop()
+
+
+def test_error_al_releer_el_top_no_cuenta_como_puntaje_perdido():
+    db = FakeDB()
+
+    def top():
+        raise ValueError("consulta rota")
+    worker = ScoreWorker(db.save, top, retry_delay=0.001).start()
+    worker.submit("x", 1)
+    worker.flush()
+    assert db.rows == [("x", 1)] and worker.saved == 1 and worker.failed == 0
+    assert worker.top_rows == [] and worker.version == 0
+    worker.stop()
+
+
+def test_stop_guarda_lo_pendiente():
+    db = FakeDB()
+    worker = ScoreWorker(db.save, db.top).start()
+    worker.submit("z", 5)
+    worker.stop()
+    assert db.rows == [("z", 5)]
+
+
+def test_telemetria_en_tanda_sin_releer_el_top():
+    db = FakeDB()
+    attempts = []
+    worker = ScoreWorker(db.save, db.top, save_attempts=lambda rows: attempts.append(list(rows))).start()
+    worker.flush()
+    version = worker.version
+    worker.submit_attempts([("ana", 1.0, "CASA", "C", "hit", 0.4, 0)])
+    worker.submit_attempts([])
+    worker.flush()
+    assert attempts == [[("ana", 1.0, "CASA", "C", "hit", 0.4, 0)]]
+    assert worker.version == version and worker.attempts_saved == 1
+    worker.stop()
+
+
+def test_error_de_telemetria_no_pierde_el_puntaje():
+    db = FakeDB()
+
+    def boom(rows):
+        raise RuntimeError("disco lleno")
+    worker = ScoreWorker(db.save, db.top, save_attempts=boom).start()
+    db.gate.clear()   # que el puntaje y la telemetría caigan en la misma tanda
+    worker.submit_attempts([("ana", 1.0, "CASA", "C", "hit", 0.4, 0)])
+    worker.submit("ana", 10)
+    db.gate.set()
+    worker.flush()
+    assert db.rows == [("ana", 10)] and worker.attempts_failed == 1 and worker.failed == 0
+    worker.stop()
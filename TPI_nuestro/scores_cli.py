@@ -0,0 +1,73 @@
+# scores_cli.py
+# Importar / exportar puntajes de scores.db en bloque (CSV o NDJSON)
+# Uso: python scores_cli.py export -o puntajes.csv
+#      python scores_cli.py import kiosco1.csv kiosco2.ndjson
+#      python scores_cli.py --db otra.db export --format ndjson   (sin -o: a stdout)
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+import models
+import services
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+
+def read_records(stream, fmt="csv"):
+    """Genera los registros de un archivo CSV (con encabezado name,score[,created_at]) o NDJSON."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "ndjson":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"formato desconocido: {fmt!r}")
+
+def _open(path, mode):
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    return open(path, mode, newline="", encoding="utf-8")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Importar / exportar puntajes en bloque")
+    ap.add_argument("--db", help="base a usar (default: scores.db del proyecto)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    exp = sub.add_parser("export", help="exportar todos los puntajes")
+    exp.add_argument("-o", "--output", default="-", help="archivo de salida ('-' = stdout)")
+    exp.add_argument("--format", choices=("csv", "ndjson"))
+    imp = sub.add_parser("import", help="importar puntajes (todo o nada por archivo)")
+    imp.add_argument("files", nargs="+", help="archivos CSV / NDJSON ('-' = stdin)")
+    imp.add_argument("--format", choices=("csv", "ndjson"))
+    args = ap.parse_args(argv)
+
+    if args.db:
+        models.configure(os.path.abspath(args.db))
+
+    if args.cmd == "export":
+        fmt = detect_format(args.output, args.format)
+        out = _open(args.output, "w")
+        try:
+            n = services.export_scores(out, fmt)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        print(f"{n} puntajes exportados", file=sys.stderr)
+    else:
+        for path in args.files:
+            f = _open(path, "r")
+            try:
+                n = services.import_scores(read_records(f, detect_format(path, args.format)))
+            finally:
+                if f is not sys.stdin:
+                    f.close()
+            print(f"{path}: {n} puntajes importados", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+# Tests de la CLI de importación / exportación (sobre bases temporales)
+
+import json
+
+import models
+import services
+from scores_cli import main
+
+
+def test_cli_exporta_e_importa_entre_bases(tmp_path):
+    original = models.DB_PATH
+    src, dst = str(tmp_path / "kiosco.db"), str(tmp_path / "central.db")
+    try:
+        models.configure(src)
+        services.save_scores([("ana", 50), ("beto", 80)])
+
+        assert main(["--db", src, "export", "-o", str(tmp_path / "p.ndjson")]) == 0
+        assert main(["--db", src, "export", "-o", str(tmp_path / "p.csv")]) == 0
+        lines = (tmp_path / "p.ndjson").read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["name"] for line in lines] == ["ana", "beto"]
+        assert (tmp_path / "p.csv").read_text(encoding="utf-8").splitlines()[0] == "name,score,created_at"
+
+        assert main(["--db", dst, "import", str(tmp_path / "p.csv"), str(tmp_path / "p.ndjson")]) == 0
+        assert [(name, score) for name, score, _ in services.get_top()] == [("beto", 80), ("beto", 80), ("ana", 50), ("ana", 50)]
+    finally:
+        models.configure(original)
@@ -1,25 +1,347 @@
 # services.py
-from models import SessionLocal, Score
+import models
+from models import get_session, LetterAttempt, PlayerDaily, PlayerStats, Score
+from sqlalchemy import and_, case, func, or_, select
 from datetime import datetime
+import base64
+import csv
+import json
+import threading
 
 def save_score(name, score):
-    session = SessionLocal()
+    save_scores([(name, score)])
+
+def save_scores(rows):
+    """Guarda varios (nombre, puntaje) en una sola transacción."""
+    session = get_session()
     try:
-        new_score = Score(name=name.strip()[:30], score=int(score), created_at=datetime.now())
-        session.add(new_score)
+        now = datetime.now()
+        new = [Score(name=name.strip()[:30], score=int(score), created_at=now) for name, score in rows]
+        session.add_all(new)
+        before = top_cache._db_stamp()
         session.commit()
+        top_cache.on_insert([(s.name, s.score) for s in new], before)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+def _encode_cursor(score, created_at, name, id_):
+    raw = json.dumps([score, created_at.isoformat(), name, id_]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def _decode_cursor(cursor):
+    try:
+        score, created_at, name, id_ = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(score), datetime.fromisoformat(created_at), str(name), int(id_)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"cursor inválido: {cursor!r}") from e
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# === Cache del leaderboard ===
+class TopCache:
+    """
+    Primeras páginas del leaderboard en memoria, por (limit, q).
+    Cada entrada vale para una versión de scores (scores_version, la suben triggers en la
+    misma transacción que el cambio, también si escribe otro proceso):
+    - Escrituras de este proceso: solo se descartan las entradas donde el puntaje nuevo
+      entraría (o que no tenían página siguiente).
+    - Cualquier otro cambio de versión (el juego escribe, la web lee): se vacía todo.
+    No alcanza con mirar mtime/tamaño de scores.db y su -wal: el -wal cambia antes de que el
+    commit sea visible para los lectores y una consulta en ese hueco quedaría cacheada vieja.
+    """
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.entries = {}      # (limit, q, epoch) -> (rows, next_cursor)
+        self.hits = 0
+        self.misses = 0
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _db_stamp(self):
+        """(base, versión de scores): una lectura por clave primaria."""
+        with models.get_engine().connect() as conn:
+            version = conn.exec_driver_sql("SELECT version FROM scores_version WHERE id = 1").scalar()
+        return (models.DB_PATH, version or 0)
+
+    def _check_locked(self, stamp):
+        if stamp != self._stamp:
+            self.entries.clear()
+            self._stamp = stamp
+
+    def get(self, key):
+        """(rows, next_cursor) cacheado, o (None, stamp) para pasarle a put() después de consultar."""
+        stamp = self._db_stamp()
+        with self._lock:
+            self._check_locked(stamp)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, stamp
+            self.hits += 1
+            return entry, stamp
+
+    def put(self, key, value, stamp):
+        # si la consulta vio un commit posterior a `stamp`, el próximo get() la descarta igual
+        with self._lock:
+            if stamp != self._stamp:
+                return   # la base cambió mientras se consultaba
+            if len(self.entries) >= self.max_entries:
+                self.entries.pop(next(iter(self.entries)))
+            self.entries[key] = value
+
+    def on_insert(self, rows, before):
+        """Después de un commit propio: invalida solo las páginas afectadas por los (nombre, puntaje) nuevos
+           (las que lo incluirían o las que no tenían página siguiente y ahora tendrían).
+           before: stamp de la base justo antes del commit; si no coincide con el cacheado, o si la
+           versión subió más que las filas insertadas (escribió alguien más), se vacía todo.
+        """
+        after = self._db_stamp()
+        with self._lock:
+            if before != self._stamp or after != (before[0], before[1] + len(rows)):
+                self.entries.clear()
+            for key, (cached, next_cursor) in list(self.entries.items()):
+                limit, q = key[:2]
+                q = q.lower()
+                for name, score in rows:
+                    # sin página siguiente (incompleta o justo llena), cualquier fila nueva cambia
+                    # la página o su cursor; con página siguiente, solo si entra en esta
+                    if q in name.lower() and (next_cursor is None or score > cached[-1][1]):
+                        del self.entries[key]
+                        break
+            self._stamp = after
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
+
+top_cache = TopCache()
+
+def scores_version():
+    """Contador que cambia con cada alta/baja/cambio en scores (sirve de ETag)."""
+    return top_cache._db_stamp()[1]
+
+def search_top(limit=20, q="", cursor=None, epoch=False):
+    """Página del leaderboard: hasta `limit` filas (nombre, puntaje, fecha) cuyo nombre contiene `q`
+       (sin distinguir mayúsculas), más el cursor de la página siguiente (None si no hay más).
+       Recorre el índice ix_scores_top en orden y corta al juntar limit+1 filas. Con `q`, antes
+       mira player_stats (costo proporcional a la cantidad de jugadores, no de partidos): si nadie
+       coincide no toca scores y si coinciden pocos partidos va por ix_scores_name_top (ver _name_filter).
+       Las primeras páginas (sin cursor) salen de top_cache mientras la base no cambie.
+       epoch=True: la fecha va como segundos desde 1970 (int) en vez de "dd/mm/aaaa hh:mm:ss".
+    """
+    q = (q or "").strip()
+    limit = max(0, int(limit))
+    if cursor:
+        return _query_top(limit, q, cursor, epoch)
+    key = (limit, q, epoch)
+    cached, stamp = top_cache.get(key)
+    if cached is not None:
+        return list(cached[0]), cached[1]
+    rows, next_cursor = _query_top(limit, q, None, epoch)
+    top_cache.put(key, (rows, next_cursor), stamp)
+    return list(rows), next_cursor
+
+def _name_filter(session, q, limit):
+    """Filtro de nombre para _query_top, o None si ningún jugador coincide con `q`.
+       Usa player_stats (una fila por jugador) para saber cuántos partidos coinciden: si son
+       muchos, recorrer ix_scores_top filtrando junta limit+1 enseguida; si son pocos, va por
+       los rangos de esos jugadores en ix_scores_name_top en vez de leer todo el índice.
+    """
+    like = PlayerStats.name.ilike(f"%{_escape_like(q)}%", escape="\\")
+    total, games = session.query(
+        func.coalesce(func.sum(PlayerStats.games), 0),
+        func.coalesce(func.sum(case((like, PlayerStats.games), else_=0)), 0),
+    ).one()
+    if not games:
+        return None
+    # recorrer el top lee ~(limit+1) * total / games filas; ir por nombre lee `games` y las ordena
+    if games * games > (limit + 1) * total:
+        return Score.name.ilike(f"%{_escape_like(q)}%", escape="\\")
+    return Score.name.in_(select(PlayerStats.name).where(like))
+
+def _query_top(limit, q, cursor, epoch=False):
+    session = get_session()
+    try:
+        order = (Score.score.desc(), Score.created_at.asc(), Score.name.asc(), Score.id.asc())
+        query = session.query(Score.name, Score.score, Score.created_at, Score.id).order_by(*order)
+        if q:
+            name_filter = _name_filter(session, q, limit)
+            if name_filter is None:
+                return [], None
+            query = query.filter(name_filter)
+        if cursor:
+            # keyset: todo lo que va después de la última fila entregada, en el orden del índice
+            c_score, c_created, c_name, c_id = _decode_cursor(cursor)
+            query = query.filter(or_(
+                Score.score < c_score,
+                and_(Score.score == c_score, or_(
+                    Score.created_at > c_created,
+                    and_(Score.created_at == c_created, or_(
+                        Score.name > c_name,
+                        and_(Score.name == c_name, Score.id > c_id))))),
+            ))
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            if rows:   # limit=0: página vacía, sin cursor
+                last = rows[-1]
+                next_cursor = _encode_cursor(last.score, last.created_at, last.name, last.id)
+        if epoch:
+            return [(r[0], r[1], int(r[2].timestamp())) for r in rows], next_cursor
+        return [(r[0], r[1], r[2].strftime("%d/%m/%Y %H:%M:%S")) for r in rows], next_cursor
     finally:
         session.close()
 
 def get_top(limit=20):
-    session = SessionLocal()
+    return search_top(limit)[0]
+
+# === Progreso por jugador (CU06) ===
+def _trend(days):
+    """Pendiente (puntos por día) de la recta que mejor ajusta los promedios diarios; None con menos de 2 días."""
+    if len(days) < 2:
+        return None
+    xs = [datetime.strptime(d["day"], "%Y-%m-%d").toordinal() for d in days]
+    ys = [d["average"] for d in days]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    den = sum((x - mx) ** 2 for x in xs)
+    return round(sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / den, 2)
+
+def player_progress(name, days=30):
+    """Resumen de un jugador leído de los rollups (player_stats / player_daily), sin recorrer scores:
+       partidas, mejor, promedio, primera/última partida, los últimos `days` días jugados
+       (día, partidas, mejor, promedio) y la tendencia. None si nunca jugó.
+    """
+    session = get_session()
+    try:
+        stats = session.get(PlayerStats, name.strip()[:30])
+        if stats is None:
+            return None
+        daily = (session.query(PlayerDaily.day, PlayerDaily.games, PlayerDaily.total, PlayerDaily.best)
+                 .filter(PlayerDaily.name == stats.name)
+                 .order_by(PlayerDaily.day.desc()).limit(days).all())
+        per_day = [{"day": day, "games": games, "best": best, "average": round(total / games, 1)}
+                   for day, games, total, best in reversed(daily)]
+        return {
+            "name": stats.name,
+            "games": stats.games,
+            "best": stats.best,
+            "average": round(stats.total / stats.games, 1),
+            "first_at": stats.first_at.strftime("%d/%m/%Y %H:%M:%S") if stats.first_at else None,
+            "last_at": stats.last_at.strftime("%d/%m/%Y %H:%M:%S") if stats.last_at else None,
+            "trend": _trend(per_day),
+            "days": per_day,
+        }
+    finally:
+        session.close()
+
+# === Importación / exportación en bloque ===
+EXPORT_FIELDS = ("name", "score", "created_at")
+_DT_FORMAT = "%Y-%m-%d %H:%M:%S.%f"   # como guarda SQLAlchemy un DateTime en SQLite
+_INSERT_SQL = "INSERT INTO scores (name, score, created_at) VALUES (?, ?, ?)"
+
+def _import_row(rec, now):
+    if isinstance(rec, dict):
+        name, score, created = rec["name"], rec["score"], rec.get("created_at")
+    else:
+        name, score, created = (tuple(rec) + (None,))[:3]
+    if not created:
+        created = now
+    elif isinstance(created, str):
+        created = datetime.fromisoformat(created)
+    elif isinstance(created, (int, float)):
+        created = datetime.fromtimestamp(created)
+    return (str(name).strip()[:30], int(score), created.strftime(_DT_FORMAT))
+
+def import_scores(records, batch_size=5000):
+    """Inserta registros {name, score, created_at} (o tuplas en ese orden) con executemany por tandas,
+       todo en una transacción: si un registro es inválido no se guarda ninguno. Devuelve cuántos insertó.
+       Los rollups se recalculan una vez al final (models.scores_bulk_load), no fila por fila:
+       ~2,2 s cada 100k filas (con el índice por nombre), contra más de 3 s con los triggers por fila.
+       created_at puede ser datetime, ISO 8601, epoch o faltar (ahora).
+    """
+    now = datetime.now()
+    count = 0
+    with models.get_engine().begin() as conn, models.scores_bulk_load(conn):
+        batch = []
+        for rec in records:
+            batch.append(_import_row(rec, now))
+            if len(batch) >= batch_size:
+                conn.exec_driver_sql(_INSERT_SQL, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.exec_driver_sql(_INSERT_SQL, batch)
+            count += len(batch)
+    return count
+
+def export_scores(stream, fmt="csv", batch_size=5000):
+    """Escribe todos los puntajes en `stream` (texto) como CSV con encabezado o NDJSON,
+       leyendo la tabla por tandas con un cursor en streaming. Devuelve cuántos escribió.
+    """
+    if fmt not in ("csv", "ndjson"):
+        raise ValueError(f"formato desconocido: {fmt!r}")
+    query = select(Score.name, Score.score, Score.created_at).order_by(Score.id)
+    count = 0
+    with models.get_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        writer = csv.writer(stream) if fmt == "csv" else None
+        if writer:
+            writer.writerow(EXPORT_FIELDS)
+        for name, score, created in result:
+            created = created.isoformat(" ") if created else ""
+            if writer:
+                writer.writerow((name, score, created))
+            else:
+                stream.write(json.dumps({"name": name, "score": score, "created_at": created}, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+# === Telemetría por letra ===
+_ATTEMPT_SQL = ("INSERT INTO letter_attempts (name, word, letter, outcome, elapsed, misses, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+def save_attempts(rows):
+    """Guarda una tanda de intentos (nombre, t, palabra, letra, "hit"|"skip", segundos, fallos)
+       en una transacción; t es time.time() del frame.
+    """
+    params = [(name.strip()[:30], word, letter, outcome, float(elapsed), int(misses),
+               datetime.fromtimestamp(t).strftime(_DT_FORMAT))
+              for name, t, word, letter, outcome, elapsed, misses in rows]
+    if params:
+        with models.get_engine().begin() as conn:
+            conn.exec_driver_sql(_ATTEMPT_SQL, params)
+    return len(params)
+
+def letter_stats(since=None):
+    """Intentos agrupados por letra (desde `since`, datetime, si se pasa), las más lentas primero:
+       intentos, confirmadas, salteadas, segundos promedio hasta confirmar y fallos promedio.
+       Las que nunca se confirmaron van adelante (avg_seconds None).
+    """
+    hit = LetterAttempt.outcome == "hit"
+    session = get_session()
     try:
-        rows = (
-            session.query(Score.name, Score.score, Score.created_at)
-            .order_by(Score.score.desc(), Score.created_at.asc())
-            .limit(limit)
-            .all()
-        )
-        return [(r[0], r[1], r[2].strftime("%d/%m/%Y %H:%M:%S")) for r in rows]
+        query = session.query(
+            LetterAttempt.letter,
+            func.count(),
+            func.sum(case((hit, 1), else_=0)),
+            func.avg(case((hit, LetterAttempt.elapsed))),
+            func.avg(LetterAttempt.misses),
+        ).group_by(LetterAttempt.letter)
+        if since is not None:
+            query = query.filter(LetterAttempt.created_at >= since)
+        stats = [{
+            "letter": letter,
+            "attempts": attempts,
+            "hits": hits,
+            "skips": attempts - hits,
+            "avg_seconds": round(avg_s, 3) if avg_s is not None else None,
+            "avg_misses": round(avg_m, 2),
+        } for letter, attempts, hits, avg_s, avg_m in query.all()]
     finally:
         session.close()
+    stats.sort(key=lambda r: (r["avg_seconds"] is not None, -(r["avg_seconds"] or 0)))
+    return stats
@@ -0,0 +1,265 @@
+# Tests de la capa de datos (sobre una base temporal, no toca scores.db)
+
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+import models
+import services
+
+
+@pytest.fixture
+def db(tmp_path):
+    original = models.DB_PATH
+    models.configure(str(tmp_path / "test.db"))
+    yield
+    models.configure(original)
+
+
+def test_save_y_top_ordenado(db):
+    services.save_scores([("ana", 50), ("  beto  ", 80)])
+    services.save_score("carla" * 10, 50)
+    top = services.get_top(2)
+    assert [(name, score) for name, score, _ in top] == [("beto", 80), ("ana", 50)]
+    assert [name for name, _, _ in services.get_top()][-1] == ("carla" * 10)[:30]
+
+
+def test_engine_perezoso_con_wal(db):
+    assert models._engine is None
+    services.get_top()
+    engine = models.get_engine()
+    assert engine is models.get_engine()
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_lote_con_error_no_guarda_nada(db):
+    with pytest.raises(Exception):
+        services.save_scores([("ok", 1), ("mal", "no-es-numero")])
+    assert services.get_top() == []
+
+
+def test_migracion_agrega_indice_y_top_no_ordena(tmp_path):
+    path = str(tmp_path / "viejo.db")
+    conn = sqlite3.connect(path)   # scores.db de antes del índice
+    conn.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(30) NOT NULL, "
+                 "score INTEGER NOT NULL, created_at DATETIME)")
+    conn.execute("INSERT INTO scores (name, score, created_at) VALUES ('vieja', 7, '2025-01-01 10:00:00.000000')")
+    conn.commit()
+    conn.close()
+
+    original = models.DB_PATH
+    models.configure(path)
+    try:
+        assert services.get_top() == [("vieja", 7, "01/01/2025 10:00:00")]
+        with models.get_engine().connect() as c:
+            plan = " ".join(row[-1] for row in c.execute(text(
+                "EXPLAIN QUERY PLAN SELECT name, score, created_at FROM scores "
+                "ORDER BY score DESC, created_at ASC LIMIT 20")))
+        assert "COVERING INDEX ix_scores_top" in plan and "TEMP B-TREE" not in plan
+    finally:
+        models.configure(original)
+
+
+def test_busqueda_en_sql_y_paginado_con_cursor(db):
+    # muchos empates de puntaje y fecha (un solo lote): el cursor igual no repite ni saltea filas
+    services.save_scores([(f"jugador{i:03d}", i % 7) for i in range(150)] + [("ZETA_x", 3), ("otro%", 3)])
+    everything, cursor = services.search_top(1000)
+    assert cursor is None and len(everything) == 152
+
+    pages, cursor = [], None
+    while True:
+        rows, cursor = services.search_top(40, "JUGADOR0", cursor)
+        pages.append(rows)
+        if cursor is None:
+            break
+    assert [len(p) for p in pages] == [40, 40, 20]
+    found = [r for p in pages for r in p]
+    assert found == [r for r in everything if "jugador0" in r[0]]
+
+    assert [r[0] for r in services.search_top(10, "zeta_")[0]] == ["ZETA_x"]
+    assert [r[0] for r in services.search_top(10, "%")[0]] == ["otro%"]   # comodines escapados
+    with pytest.raises(ValueError):
+        services.search_top(10, cursor="no-es-un-cursor")
+
+
+def test_busqueda_de_pocos_partidos_va_por_nombre(db):
+    # "zorro" tiene 30 de 1030 partidos y puntajes bajos: recorrer el top sería leerlo casi entero
+    services.import_scores([(f"p{i % 50}", 100 + i) for i in range(1000)]
+                           + [("Zorro", i % 4) for i in range(25)] + [("zorrito", 2)] * 5)
+    everything = services.search_top(2000)[0]
+    pages, cursor = [], None
+    while True:
+        rows, cursor = services.search_top(8, "ZORR", cursor)
+        pages.append(rows)
+        if cursor is None:
+            break
+    assert [len(p) for p in pages] == [8, 8, 8, 6]
+    assert [r for p in pages for r in p] == [r for r in everything if "zorr" in r[0].lower()]
+    assert services.search_top(8, "nadie") == ([], None)
+
+
+def test_cache_del_top_aciertos_e_invalidacion(db):
+    services.save_scores([("ana", 50), ("beto", 40), ("carla", 30)])
+    cache = services.top_cache
+    hits, misses = cache.hits, cache.misses
+    first = services.search_top(2)
+    assert services.search_top(2) == first and services.search_top(2, "ana") == services.search_top(2, "ana")
+    assert (cache.hits - hits, cache.misses - misses) == (2, 2)
+
+    services.save_score("dani", 10)          # no entra en ninguna página cacheada
+    assert set(cache.entries) == {(2, "", False), (2, "ana", False)}
+    services.save_score("mariana", 45)        # entra en el top 2 y en la búsqueda "ana"
+    assert set(cache.entries) == set()
+    assert [r[0] for r in services.search_top(2)[0]] == ["ana", "mariana"]
+
+
+def test_cache_pagina_justo_llena_gana_cursor_con_fila_menor(db):
+    services.save_scores([("ana", 50), ("beto", 40)])
+    assert services.search_top(2)[1] is None          # página llena, sin siguiente (queda cacheada)
+    services.save_score("carla", 10)                  # no entra en la página, pero ahora hay siguiente
+    rows, next_cursor = services.search_top(2)
+    assert (rows, next_cursor) == services._query_top(2, "", None)
+    assert next_cursor is not None
+    assert [r[0] for r in services.search_top(2, cursor=next_cursor)[0]] == ["carla"]
+
+
+def test_cache_ve_escrituras_de_otro_proceso(db):
+    services.save_score("ana", 50)
+    assert [r[0] for r in services.search_top(5)[0]] == ["ana"]
+    conn = sqlite3.connect(models.DB_PATH)   # como el juego, desde otra conexión
+    conn.execute("INSERT INTO scores (name, score, created_at) VALUES ('juego', 99, '2025-01-01 10:00:00.000000')")
+    conn.commit()
+    conn.close()
+    assert [r[0] for r in services.search_top(5)[0]] == ["juego", "ana"]
+
+
+def test_cache_no_guarda_una_pagina_leida_antes_de_un_commit_ajeno(db):
+    # la página se consultó con la versión vieja y otro proceso hizo commit antes del put():
+    # no tiene que quedar cacheada aunque los archivos de la base no parezcan cambiar
+    services.save_score("ana", 50)
+    cache = services.top_cache
+    cached, stamp = cache.get(("x", "", False))
+    assert cached is None
+    with models.get_engine().begin() as conn:
+        conn.execute(text("INSERT INTO scores (name, score, created_at) VALUES ('juego', 99, '2025-01-01 10:00:00.000000')"))
+    cache.put(("x", "", False), ([("ana", 50, "")], None), stamp)
+    assert cache.get(("x", "", False))[0] is None
+    assert services.scores_version() == stamp[1] + 1
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_export_e_import_ida_y_vuelta(db, tmp_path, fmt):
+    import io
+    from datetime import datetime
+
+    n = services.import_scores(
+        [{"name": f"p{i}", "score": i % 97, "created_at": datetime(2025, 1, 1, 10, 0, i % 60, 123456)} for i in range(1200)]
+        + [("ñandú", 500, "2025-02-03T04:05:06"), ("sin fecha", 1)],
+        batch_size=500,
+    )
+    assert n == 1202
+    top = services.get_top(3)
+    assert top[0][:2] == ("ñandú", 500)
+
+    out = io.StringIO()
+    assert services.export_scores(out, fmt) == 1202
+
+    original = models.DB_PATH
+    models.configure(str(tmp_path / "copia.db"))
+    try:
+        from scores_cli import read_records
+        assert services.import_scores(read_records(io.StringIO(out.getvalue()), fmt)) == 1202
+        copia = io.StringIO()
+        services.export_scores(copia, fmt)
+        assert copia.getvalue() == out.getvalue()
+        assert services.get_top(3) == top
+    finally:
+        models.configure(original)
+
+
+def test_import_con_error_no_guarda_nada(db):
+    services.save_score("previo", 10)
+    with pytest.raises(ValueError):
+        services.import_scores([("ok", 1)] * 10 + [("mal", "no-es-numero")], batch_size=4)
+    assert [name for name, _, _ in services.get_top()] == ["previo"]
+    services.save_score("despues", 3)   # el rollback dejó los triggers de insert
+    assert services.player_progress("despues")["games"] == 1
+
+
+def test_import_recalcula_rollups_y_version_al_final(db):
+    services.save_score("ana", 10)
+    before = services.scores_version()
+    assert services.import_scores([("ana", 20), ("beto", 5), ("ana", 30)], batch_size=2) == 3
+    assert services.scores_version() == before + 3
+    with models.get_engine().connect() as conn:
+        stats = conn.execute(text("SELECT name, games, total, best FROM player_stats ORDER BY name")).all()
+        assert stats == conn.execute(text(
+            "SELECT name, count(*), sum(score), max(score) FROM scores GROUP BY name ORDER BY name")).all()
+        triggers = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%insert'")).scalars()
+        assert sorted(triggers) == ["player_rollup_insert", "scores_version_insert"]
+
+
+def test_progreso_por_jugador_desde_rollups(db):
+    from datetime import datetime
+    services.import_scores([
+        ("ana", 10, datetime(2025, 3, 1, 9)), ("ana", 30, datetime(2025, 3, 1, 18)),
+        ("ana", 50, datetime(2025, 3, 3, 12)), ("beto", 99, datetime(2025, 3, 2, 12)),
+    ])
+    services.save_score(" ana ", 70)
+    p = services.player_progress("ana")
+    assert (p["games"], p["best"], p["average"]) == (4, 70, 40.0)
+    assert p["first_at"] == "01/03/2025 09:00:00"
+    assert [(d["day"], d["games"], d["average"]) for d in p["days"][:2]] == [("2025-03-01", 2, 20.0), ("2025-03-03", 1, 50.0)]
+    assert p["trend"] > 0
+    assert services.player_progress("ana", days=1)["days"][0]["best"] == 70
+    assert services.player_progress("nadie") is None
+
+    # bajas / cambios recalculan al jugador; el rollup coincide con agregar scores a mano
+    with models.get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM scores WHERE name = 'ana' AND score = 70"))
+        conn.execute(text("UPDATE scores SET name = 'ana' WHERE name = 'beto'"))
+        stats = conn.execute(text("SELECT games, total, best FROM player_stats ORDER BY name")).all()
+        assert stats == conn.execute(text("SELECT count(*), sum(score), max(score) FROM scores GROUP BY name")).all()
+    assert services.player_progress("beto") is None
+
+
+def test_migracion_carga_rollups_de_una_base_vieja(tmp_path):
+    path = str(tmp_path / "vieja.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY, name VARCHAR(30) NOT NULL, "
+                 "score INTEGER NOT NULL, created_at DATETIME)")
+    conn.executemany("INSERT INTO scores (name, score, created_at) VALUES (?, ?, ?)",
+                     [("ana", 5, "2025-01-01 10:00:00.000000"), ("ana", 9, "2025-01-02 10:00:00.000000")])
+    conn.commit()
+    conn.close()
+
+    original = models.DB_PATH
+    models.configure(path)
+    try:
+        assert services.player_progress("ana")["games"] == 2
+        services.save_score("ana", 1)
+        models.configure(path)   # reabrir no vuelve a cargar ni duplica
+        assert services.player_progress("ana")["games"] == 3
+    finally:
+        models.configure(original)
+
+
+def test_telemetria_por_letra_en_tanda(db):
+    from datetime import datetime, timedelta
+    t = datetime(2025, 5, 1, 12).timestamp()
+    rows = [
+        ("ana", t, "CASA", "C", "hit", 0.5, 0), ("ana", t + 1, "CASA", "A", "hit", 2.5, 3),
+        ("ana", t + 2, "CASA", "S", "skip", 4.0, 1), ("beto", t + 3, "ARBOL", "A", "hit", 1.5, 1),
+    ]
+    assert services.save_attempts(rows) == 4
+    assert services.save_attempts([]) == 0
+    stats = services.letter_stats()
+    assert [r["letter"] for r in stats] == ["S", "A", "C"]   # nunca confirmada, luego la más lenta
+    a = stats[1]
+    assert (a["attempts"], a["hits"], a["skips"], a["avg_seconds"], a["avg_misses"]) == (2, 2, 0, 2.0, 2.0)
+    assert stats[0]["skips"] == 1 and stats[0]["avg_seconds"] is None
+    assert services.letter_stats(since=datetime(2025, 5, 1, 12) + timedelta(seconds=2.5))[0]["letter"] == "A"
+    assert services.get_top() == []   # la telemetría no toca scores
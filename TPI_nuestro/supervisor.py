@@ -0,0 +1,258 @@
+# supervisor.py
+# Supervisor del proceso del juego para app.py + latidos (heartbeats) desde tpi_juego.py
+# Uso (web):   sup = GameSupervisor([sys.executable, "tpi_juego.py"], cwd=BASE_DIR); sup.start(); sup.status()
+#      (juego): hb = Heartbeat.from_env(); hb.update(state="PLAY", fps=29.8)   # None si no lo lanzó el supervisor
+#
+# Canal: multiprocessing.connection sobre 127.0.0.1 (anda igual en Windows y Linux), autenticado con una
+# clave al azar que el juego recibe por variable de entorno. Los mensajes van como JSON (send_bytes),
+# nunca con pickle.
+
+import json
+import os
+import secrets
+import subprocess
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+ENV_ADDRESS = "TPI_SUPERVISOR"       # "host:puerto" del supervisor
+ENV_AUTHKEY = "TPI_SUPERVISOR_KEY"   # clave en hex
+
+# -------------------- Lado del juego --------------------
+class Heartbeat:
+    """
+    Manda el último estado publicado con update(): enseguida después del primero (así el
+    supervisor mide el tiempo de arranque hasta el primer frame) y después cada `interval` segundos.
+    update() solo reemplaza un dict: el loop de frames nunca espera al socket.
+    """
+    def __init__(self, address, authkey, interval=1.0):
+        self.interval = interval
+        self._fields = {}
+        self._lock = threading.Lock()
+        self._updated = threading.Event()
+        self._stop = threading.Event()
+        self._conn = Client(address, authkey=authkey)
+        self._thread = threading.Thread(target=self._run, name="latidos", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls, interval=1.0):
+        """Heartbeat hacia el supervisor que lanzó este proceso, o None (juego lanzado a mano / sin supervisor)."""
+        address, key = os.environ.get(ENV_ADDRESS), os.environ.get(ENV_AUTHKEY)
+        if not address or not key:
+            return None
+        host, port = address.rsplit(":", 1)
+        try:
+            return cls((host, int(port)), bytes.fromhex(key), interval)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Sin conexión con el supervisor: {e}")
+            return None
+
+    def update(self, **fields):
+        with self._lock:
+            self._fields = fields
+        self._updated.set()
+
+    def _send(self, msg):
+        msg["pid"] = os.getpid()
+        msg["t"] = time.time()
+        self._conn.send_bytes(json.dumps(msg).encode())
+
+    def _run(self):
+        self._updated.wait()
+        while not self._stop.is_set():
+            with self._lock:
+                fields = dict(self._fields)
+            try:
+                self._send({"type": "beat", **fields})
+            except OSError:
+                return   # el supervisor se fue: el juego sigue igual
+            self._stop.wait(self.interval)
+
+    def close(self):
+        self._stop.set()
+        self._updated.set()
+        self._thread.join(self.interval + 1)
+        try:
+            self._conn.close()
+        except OSError:
+            pass
+
+# -------------------- Lado de la web --------------------
+class GameSupervisor:
+    """
+    Lanza el juego, recibe sus latidos y lo relanza si se cae (código de salida != 0).
+    Salir desde el juego (ESC / Q, código 0) o stop() no cuentan como caída.
+    Reintenta con espera creciente (backoff * 2**n) hasta `max_restarts` caídas seguidas;
+    una corrida de más de `stable_after` segundos vuelve el contador a cero.
+    """
+    def __init__(self, cmd, cwd=None, creationflags=0, restart=True, max_restarts=5, backoff=1.0,
+                 stable_after=30.0, heartbeat_timeout=5.0, poll=0.5, on_change=None):
+        self.cmd = list(cmd)
+        self.cwd = cwd
+        self.creationflags = creationflags
+        self.restart = restart
+        self.max_restarts = max_restarts
+        self.backoff = backoff
+        self.stable_after = stable_after
+        self.heartbeat_timeout = heartbeat_timeout
+        self.poll = poll
+        self.on_change = on_change       # se llama cuando el juego arranca, termina o se relanza
+        self.proc = None
+        self.restarts = 0                # relanzamientos automáticos en total
+        self.crashes = []                # [{"at", "returncode", "uptime_s"}], las últimas 10
+        self.gave_up = False
+        self._consecutive = 0
+        self._restart_at = None          # cuándo relanzar después de una caída
+        self._launched_at = None
+        self._ready_at = None            # primer latido (= primer frame) del proceso actual
+        self._last = None                # último latido del proceso actual
+        self._last_at = None
+        self._lock = threading.RLock()
+        self._authkey = secrets.token_bytes(16)
+        self._listener = None
+
+    # ---- control ----
+    def start(self):
+        """Lanza el juego. Devuelve (ok, mensaje) como app.start_game."""
+        with self._lock:
+            if self.running():
+                return False, "El juego ya está corriendo."
+            self._consecutive = 0
+            self._restart_at = None
+            self.gave_up = False
+            try:
+                self._launch()
+            except Exception as e:
+                return False, f"No se pudo iniciar: {e}"
+        self._changed()
+        return True, "Juego iniciado."
+
+    def stop(self):
+        with self._lock:
+            self._restart_at = None
+            if not self.running():
+                return False, "No hay juego corriendo."
+            proc, self.proc = self.proc, None
+            self._last = None
+        try:
+            proc.terminate()
+        except Exception as e:
+            return False, f"Error al detener: {e}"
+        self._changed()
+        return True, "Juego detenido."
+
+    def running(self):
+        proc = self.proc
+        return proc is not None and proc.poll() is None
+
+    def _launch(self):
+        self._ensure_threads()
+        host, port = self._listener.address
+        env = dict(os.environ, **{ENV_ADDRESS: f"{host}:{port}", ENV_AUTHKEY: self._authkey.hex()})
+        self._last = self._ready_at = self._last_at = None
+        self._launched_at = time.time()
+        self.proc = subprocess.Popen(self.cmd, cwd=self.cwd, env=env, creationflags=self.creationflags)
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    # ---- hilos ----
+    def _ensure_threads(self):
+        if self._listener is not None:
+            return
+        self._listener = Listener(("127.0.0.1", 0), authkey=self._authkey)
+        threading.Thread(target=self._accept_loop, name="supervisor-ipc", daemon=True).start()
+        threading.Thread(target=self._monitor_loop, name="supervisor", daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                continue   # clave equivocada / conexión cortada: se ignora
+            threading.Thread(target=self._read_loop, args=(conn,), name="supervisor-latidos", daemon=True).start()
+
+    def _read_loop(self, conn):
+        with conn:
+            while True:
+                try:
+                    msg = json.loads(conn.recv_bytes())
+                except (EOFError, OSError, ValueError):
+                    return
+                self._on_message(msg)
+
+    def _on_message(self, msg):
+        with self._lock:
+            proc = self.proc
+            if proc is None or msg.get("pid") != proc.pid:
+                return   # latido de un proceso anterior
+            now = time.time()
+            if msg.get("type") != "beat":
+                return
+            if self._ready_at is None:
+                self._ready_at = now
+            self._last = msg
+            self._last_at = now
+
+    def _monitor_loop(self):
+        while True:
+            time.sleep(self.poll)
+            self.check()
+
+    def check(self, now=None):
+        """Detecta caídas y relanza cuando corresponde (lo llama el hilo monitor)."""
+        if now is None:
+            now = time.time()
+        changed = False
+        with self._lock:
+            proc = self.proc
+            code = proc.poll() if proc is not None else None
+            if proc is not None and code is not None:
+                self.proc = None
+                changed = True
+                if code != 0:
+                    uptime = now - self._launched_at
+                    self.crashes = (self.crashes + [{"at": now, "returncode": code, "uptime_s": round(uptime, 1)}])[-10:]
+                    self._consecutive = 1 if uptime >= self.stable_after else self._consecutive + 1
+                    if not self.restart or self._consecutive > self.max_restarts:
+                        self.gave_up = self.restart
+                    else:
+                        self._restart_at = now + self.backoff * 2 ** (self._consecutive - 1)
+            if self._restart_at is not None and now >= self._restart_at and self.proc is None:
+                self._restart_at = None
+                try:
+                    self._launch()
+                    self.restarts += 1
+                except Exception as e:
+                    print(f"⚠️ No se pudo relanzar el juego: {e}")
+                changed = True
+        if changed:
+            self._changed()
+
+    # ---- estado ----
+    def status(self, now=None):
+        """Salud del juego para /api/status."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            running = self.running()
+            last = self._last or {}
+            age = now - self._last_at if self._last_at is not None else None
+            return {
+                "running": running,
+                "pid": self.proc.pid if running else None,
+                "healthy": running and age is not None and age <= self.heartbeat_timeout,
+                "state": last.get("state"),
+                "fps": last.get("fps"),
+                "score": last.get("score"),
+                "stages_ms": last.get("stages_ms"),
+                "heartbeat_age_s": round(age, 2) if age is not None else None,
+                "startup_s": round(self._ready_at - self._launched_at, 2) if running and self._ready_at else None,
+                "uptime_s": round(now - self._launched_at, 1) if running else None,
+                "restarts": self.restarts,
+                "restarting_in_s": round(max(0.0, self._restart_at - now), 1) if self._restart_at else None,
+                "gave_up": self.gave_up,
+                "crashes": list(self.crashes),
+            }
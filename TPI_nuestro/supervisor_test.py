@@ -0,0 +1,94 @@
+# Tests del supervisor del juego (con un "juego" falso que manda latidos y se cae a propósito)
+
+import os
+import sys
+import time
+
+from supervisor import GameSupervisor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FAKE_GAME = """
+import os, sys, time
+sys.path.insert(0, {base!r})
+from supervisor import Heartbeat
+
+runs = {runs!r}
+with open(runs, "a") as f:
+    f.write("x")
+n = len(open(runs).read())
+hb = Heartbeat.from_env(interval=0.02)
+hb.update(state="PLAY", fps=24.5, score=n, stages_ms={{"inf": 12.0}})
+time.sleep(0.2)
+codes = {codes!r}
+if n <= len(codes):
+    hb.close()
+    sys.exit(codes[n - 1])
+while True:
+    time.sleep(0.05)
+"""
+
+
+def _supervisor(tmp_path, codes, **kw):
+    script = tmp_path / "juego.py"
+    runs = tmp_path / "runs.txt"
+    script.write_text(FAKE_GAME.format(base=BASE_DIR, runs=str(runs), codes=list(codes)))
+    kw.setdefault("backoff", 0.05)
+    sup = GameSupervisor([sys.executable, str(script)], poll=0.02, **kw)
+    return sup, runs
+
+
+def _wait(cond, timeout=10.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_latidos_y_relanzamiento_despues_de_una_caida(tmp_path):
+    changes = []
+    sup, runs = _supervisor(tmp_path, [3], on_change=lambda: changes.append(1))
+    assert sup.start() == (True, "Juego iniciado.")
+    assert sup.start()[0] is False
+    assert _wait(lambda: sup.status()["fps"] == 24.5)
+    first = sup.status()
+    assert first["healthy"] and first["state"] == "PLAY" and first["stages_ms"] == {"inf": 12.0}
+    assert first["startup_s"] is not None and first["startup_s"] >= 0
+
+    # se cae con código 3: se anota y se relanza solo
+    assert _wait(lambda: sup.restarts == 1 and sup.status()["score"] == 2)
+    status = sup.status()
+    assert status["running"] and status["pid"] != first["pid"]
+    assert [c["returncode"] for c in status["crashes"]] == [3]
+    assert len(changes) >= 3   # arranque, caída, relanzamiento
+
+    assert sup.stop() == (True, "Juego detenido.")
+    time.sleep(0.2)
+    assert not sup.running() and sup.restarts == 1   # detenerlo no es una caída
+    assert sup.status()["healthy"] is False and sup.status()["fps"] is None
+
+
+def test_salir_del_juego_no_relanza(tmp_path):
+    sup, runs = _supervisor(tmp_path, [0])
+    sup.start()
+    assert _wait(lambda: not sup.running())
+    time.sleep(0.2)
+    assert runs.read_text() == "x"
+    assert sup.restarts == 0 and sup.status()["crashes"] == []
+
+
+def test_deja_de_relanzar_despues_de_max_restarts(tmp_path):
+    sup, runs = _supervisor(tmp_path, [1, 1, 1, 1], max_restarts=2, backoff=0.01)
+    sup.start()
+    assert _wait(lambda: sup.gave_up)
+    assert runs.read_text() == "xxx"
+    status = sup.status()
+    assert not status["running"] and status["restarts"] == 2 and len(status["crashes"]) == 3
+
+
+def test_sin_supervisor_no_hay_latidos(monkeypatch):
+    from supervisor import ENV_ADDRESS, Heartbeat
+    monkeypatch.delenv(ENV_ADDRESS, raising=False)
+    assert Heartbeat.from_env() is None
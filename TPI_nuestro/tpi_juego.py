@@ -4,8 +4,13 @@ import time
 import random
 import sqlite3
 import collections
+import numpy as np
 from datetime import datetime
 from tpi_letras import LetterEngine  # <- tu módulo
+from pipeline import FramePipeline
+from replay import LandmarkRecorder, load_recording, replay_frames
+from score_worker import ScoreWorker
+from supervisor import Heartbeat
 
 # =================== Config ===================
 WORDS = [
@@ -18,15 +23,21 @@ WORDS = [
 ]
 
 K = 20            # frames consecutivos para validar letra
+LETTER_K = {}     # K por letra si alguna necesita otra ventana, p. ej. {"M": 30}
 COOLDOWN = 10    # frames de cooldown
 TIME_LIMIT = 75  # segundos por partida
+PIPELINED = True # captura / inferencia / render en hilos separados
+INFER_EVERY = 1  # MediaPipe 1 de cada N frames con mano a la vista
+IDLE_EVERY = 3   # ... y 1 de cada N mientras no hay mano
+INFER_WIDTH = 640  # ancho de la copia que ve MediaPipe (la cámara sigue en 1080p)
+RECORD_PATH = None # p. ej. "sesion.lmk": graba los landmarks de cada frame (ver replay.py)
 
 FONT = cv2.FONT_HERSHEY_SIMPLEX
 
 # Leaderboard (opcional)
 USE_DB = True
-DB_PATH = "scores.db"
 TOP_LIMIT = 20
+TELEMETRY_FLUSH = 10.0  # cada cuántos segundos de juego se mandan a guardar los intentos por letra
 
 # =================== Utils UI ===================
 def center_text(img, text, y, scale=1.2, color=(255,255,255), thick=2):
@@ -54,38 +65,108 @@ def draw_text_input(img, rect, text, placeholder="Tu nombre...", focused=True):
     pad = 12
     cv2.putText(img, shown, (x1+pad, y1+int((y2-y1)*0.65)), FONT, 0.9, color, 2, cv2.LINE_AA)
 
+# =================== Capas UI cacheadas ===================
+# Los overlays que casi no cambian (menús, paneles del HUD, botones) se dibujan
+# una vez sobre un lienzo negro y otro blanco: de ahí sale, por píxel, cuánto
+# queda del fondo (keep) y cuánto color se suma (ink). Después, en cada frame,
+# solo se compone frame*keep/255 + ink en las franjas donde hay algo dibujado.
+_canvases = {}
+
+class UILayer:
+    def __init__(self, shape, draw_fn, region=None):
+        H, W = shape[:2]
+        x0, y0, x1, y1 = region if region else (0, 0, W, H)
+        if shape not in _canvases:
+            _canvases[shape] = (np.zeros(shape, np.uint8), np.full(shape, 255, np.uint8))
+        black, white = _canvases[shape]
+        black[y0:y1, x0:x1] = 0
+        white[y0:y1, x0:x1] = 255
+        self.result = draw_fn(black)
+        draw_fn(white)
+
+        ink = black[y0:y1, x0:x1]
+        keep = cv2.subtract(white[y0:y1, x0:x1], ink)
+        drawn = (keep != 255).any(axis=2)
+        self.bands = []
+        rows = np.flatnonzero(drawn.any(axis=1))
+        if len(rows):
+            # franjas de filas consecutivas con algo dibujado
+            cuts = np.flatnonzero(np.diff(rows) > 1)
+            for r0, r1 in zip(np.r_[rows[0], rows[cuts + 1]], np.r_[rows[cuts], rows[-1]] + 1):
+                cols = np.flatnonzero(drawn[r0:r1].any(axis=0))
+                c0, c1 = cols[0], cols[-1] + 1
+                band_keep = keep[r0:r1, c0:c1]
+                # franja totalmente opaca (p. ej. los paneles del HUD): basta con copiarla
+                band_keep = band_keep.copy() if band_keep.any() else None
+                self.bands.append((y0 + r0, y0 + r1, x0 + c0, x0 + c1, band_keep, ink[r0:r1, c0:c1].copy()))
+
+    def apply(self, img):
+        for y0, y1, x0, x1, keep, ink in self.bands:
+            roi = img[y0:y1, x0:x1]
+            if keep is None:
+                roi[:] = ink
+                continue
+            cv2.multiply(roi, keep, dst=roi, scale=1/255)
+            cv2.add(roi, ink, dst=roi)
+
+_layers = {}
+
+def cached_layer(name, shape, key, draw_fn, region=None):
+    """Devuelve la capa `name`, re-renderizándola solo si cambió la resolución o el contenido (key)."""
+    entry = _layers.get(name)
+    if entry is None or entry[0] != (shape, key):
+        entry = _layers[name] = ((shape, key), UILayer(shape, draw_fn, region))
+    return entry[1]
+
 # =================== HUD Helpers ===================
-def draw_hud(img, target_word, pos, score, time_left, combo, last_label):
+def _render_hud_static(img):
     H, W, _ = img.shape
-    # Panel superior
-    word_disp = "".join([f"[{c}]" if i == pos else c for i, c in enumerate(target_word)])
+    # Paneles superior / inferior + tip atajo + marco de la barra
     cv2.rectangle(img, (0,0), (W, 80), (25,25,25), -1)
-    cv2.putText(img, f"Palabra: {word_disp}", (20,50), FONT, 1.1, (255,255,255), 2, cv2.LINE_AA)
-    # Tip atajo
     hint = "S: Saltear (-5s)"
     (tw, th), _ = cv2.getTextSize(hint, FONT, 0.8, 2)
     cv2.putText(img, hint, (W - tw - 20, 50), FONT, 0.8, (255,255,255), 2, cv2.LINE_AA)
-
-    # Panel inferior
     cv2.rectangle(img, (0,H-80), (W, H), (25,25,25), -1)
-    cv2.putText(img, f"Puntos: {score}", (20,H-25), FONT, 0.9, (255,255,255), 2, cv2.LINE_AA)
-    cv2.putText(img, f"Tiempo: {max(0,int(time_left))}s", (220,H-25), FONT, 0.9, (255,255,255), 2, cv2.LINE_AA)
-    cv2.putText(img, f"Combo: x{combo}", (400,H-25), FONT, 0.9, (180,255,180), 2, cv2.LINE_AA)
-    if last_label:
-        cv2.putText(img, f"Detectado: {last_label}", (560,H-25), FONT, 0.9, (200,200,255), 2, cv2.LINE_AA)
+    bar_x, bar_y = 20, 90
+    bar_w, bar_h = W-40, 16
+    cv2.rectangle(img, (bar_x, bar_y), (bar_x+bar_w, bar_y+bar_h), (180,180,180), 2)
 
+def _render_hud_word(img, target_word, pos):
+    H, W, _ = img.shape
+    word_disp = "".join([f"[{c}]" if i == pos else c for i, c in enumerate(target_word)])
+    cv2.putText(img, f"Palabra: {word_disp}", (20,50), FONT, 1.1, (255,255,255), 2, cv2.LINE_AA)
     # Barra de progreso
     bar_x, bar_y = 20, 90
     bar_w, bar_h = W-40, 16
     done_ratio = pos / max(1, len(target_word))
-    cv2.rectangle(img, (bar_x, bar_y), (bar_x+bar_w, bar_y+bar_h), (180,180,180), 2)
     cv2.rectangle(img, (bar_x, bar_y), (bar_x+int(bar_w*done_ratio), bar_y+bar_h), (80,200,80), -1)
 
-def draw_skip_button(img):
+def _render_hud_stats(img, score, time_left, combo, last_label):
+    H, W, _ = img.shape
+    cv2.putText(img, f"Puntos: {score}", (20,H-25), FONT, 0.9, (255,255,255), 2, cv2.LINE_AA)
+    cv2.putText(img, f"Tiempo: {max(0,int(time_left))}s", (220,H-25), FONT, 0.9, (255,255,255), 2, cv2.LINE_AA)
+    cv2.putText(img, f"Combo: x{combo}", (400,H-25), FONT, 0.9, (180,255,180), 2, cv2.LINE_AA)
+    if last_label:
+        cv2.putText(img, f"Detectado: {last_label}", (560,H-25), FONT, 0.9, (200,200,255), 2, cv2.LINE_AA)
+
+def draw_hud(img, target_word, pos, score, time_left, combo, last_label):
     H, W, _ = img.shape
+    cached_layer("hud", img.shape, (), _render_hud_static).apply(img)
+    cached_layer("hud_word", img.shape, (target_word, pos),
+                 lambda c: _render_hud_word(c, target_word, pos), region=(0, 0, W, 110)).apply(img)
+    time_s = max(0, int(time_left))
+    cached_layer("hud_stats", img.shape, (score, time_s, combo, last_label),
+                 lambda c: _render_hud_stats(c, score, time_s, combo, last_label), region=(0, H-80, W, H)).apply(img)
+
+def skip_button_layout(W, H):
     btn_w, btn_h = 260, 50
     x2, y1 = W - 20, 18
-    x1, y2 = x2 - btn_w, y1 + btn_h
+    return (x2 - btn_w, y1, x2, y1 + btn_h)
+
+def _render_skip_button(img):
+    H, W, _ = img.shape
+    x1, y1, x2, y2 = skip_button_layout(W, H)
+    btn_w, btn_h = x2 - x1, y2 - y1
     cv2.rectangle(img, (x1,y1), (x2,y2), (70,70,200), -1)
     cv2.rectangle(img, (x1,y1), (x2,y2), (255,255,255), 2)
     text = "S: Saltear (-5s)"
@@ -95,6 +176,11 @@ def draw_skip_button(img):
     cv2.putText(img, text, (tx,ty), FONT, 0.7, (255,255,255), 2, cv2.LINE_AA)
     return (x1, y1, x2, y2)
 
+def draw_skip_button(img):
+    layer = cached_layer("skip", img.shape, (), _render_skip_button)
+    layer.apply(img)
+    return layer.result
+
 # =================== Start / End Menus ===================
 _last_click = None
 def _on_mouse(event, x, y, flags, param):
@@ -102,45 +188,57 @@ def _on_mouse(event, x, y, flags, param):
     if event == cv2.EVENT_LBUTTONDOWN:
         _last_click = (x, y)
 
-def draw_start_menu(img, player_name, input_focus=True):
-    H, W, _ = img.shape
-    # título
-    center_text(img, "Senas & Palabras", int(H*0.22), 2.0, (0,255,255), 5)
-    center_text(img, "Escribe tu nombre y presiona Comenzar", int(H*0.32), 0.9)
-
-    # input + botón
+def start_menu_layout(W, H):
+    """Rectángulos (input de nombre, botón Comenzar) del menú inicial."""
     box_w, box_h = int(W*0.45), 70
     box_x1 = (W - box_w)//2
     box_y1 = int(H*0.40)
     box_rect = (box_x1, box_y1, box_x1+box_w, box_y1+box_h)
-    draw_text_input(img, box_rect, player_name, focused=input_focus)
 
     btn_w, btn_h = int(W*0.25), 70
     btn_x1 = (W - btn_w)//2
     btn_y1 = int(H*0.55)
     btn_rect = (btn_x1, btn_y1, btn_x1+btn_w, btn_y1+btn_h)
+    return box_rect, btn_rect
+
+def _render_start_menu(img, player_name, input_focus=True):
+    H, W, _ = img.shape
+    # título
+    center_text(img, "Senas & Palabras", int(H*0.22), 2.0, (0,255,255), 5)
+    center_text(img, "Escribe tu nombre y presiona Comenzar", int(H*0.32), 0.9)
+
+    # input + botón
+    box_rect, btn_rect = start_menu_layout(W, H)
+    draw_text_input(img, box_rect, player_name, focused=input_focus)
     can_start = len(player_name.strip()) > 0
     draw_button(img, btn_rect, "Comenzar", active=can_start)
 
     center_text(img, "ENTER: Comenzar  |  ESC: Salir", int(H*0.75), 0.8, (200,200,200), 2)
     return box_rect, btn_rect, can_start
 
-def draw_end_menu(img, score, player_name, top_rows=None):
-    H, W, _ = img.shape
-    overlay = img.copy()
-    cv2.rectangle(overlay, (0,0), (W, H), (0,0,0), -1)
-    img[:] = cv2.addWeighted(img, 0.35, overlay, 0.65, 0)
-
-    center_text(img, f"¡Felicidades, {player_name}!", int(H*0.22), 1.6, (0,255,0), 4)
-    center_text(img, f"Tu puntaje fue: {score}", int(H*0.30), 1.3, (255,255,255), 3)
+def draw_start_menu(img, player_name, input_focus=True):
+    layer = cached_layer("start", img.shape, (player_name, input_focus),
+                         lambda c: _render_start_menu(c, player_name, input_focus))
+    layer.apply(img)
+    return layer.result
 
-    # Botones
+def end_menu_layout(W, H):
+    """Rectángulos (Volver a Jugar, Salir) del menú final."""
     btn_w, btn_h = int(W*0.28), 70
     gap = 40
     x1 = int((W - (btn_w*2 + gap)) / 2)
     y1 = int(H*0.55)
     replay_rect = (x1, y1, x1+btn_w, y1+btn_h)
     quit_rect   = (x1+btn_w+gap, y1, x1+btn_w*2+gap, y1+btn_h)
+    return replay_rect, quit_rect
+
+def _render_end_menu(img, score, player_name, top_rows=None):
+    H, W, _ = img.shape
+    center_text(img, f"¡Felicidades, {player_name}!", int(H*0.22), 1.6, (0,255,0), 4)
+    center_text(img, f"Tu puntaje fue: {score}", int(H*0.30), 1.3, (255,255,255), 3)
+
+    # Botones
+    replay_rect, quit_rect = end_menu_layout(W, H)
     draw_button(img, replay_rect, "Volver a Jugar", True)
     draw_button(img, quit_rect, "Salir", True)
 
@@ -158,6 +256,15 @@ def draw_end_menu(img, score, player_name, top_rows=None):
     center_text(img, "R: Volver a Jugar  |  Q/ESC: Salir", int(H*0.85), 0.8, (200,200,200), 2)
     return replay_rect, quit_rect
 
+def draw_end_menu(img, score, player_name, top_rows=None):
+    # oscurecer in-place (overlay negro al 65%) sin copiar el frame
+    cv2.convertScaleAbs(img, dst=img, alpha=0.35)
+    rows_key = tuple(top_rows[:TOP_LIMIT]) if top_rows else ()
+    layer = cached_layer("end", img.shape, (score, player_name, rows_key),
+                         lambda c: _render_end_menu(c, score, player_name, top_rows))
+    layer.apply(img)
+    return layer.result
+
 def point_in_rect(x, y, rect):
     x1, y1, x2, y2 = rect
     return x1 <= x <= x2 and y1 <= y <= y2
@@ -176,109 +283,426 @@ def _new_words_queue():
     random.shuffle(words)
     return words
 
-# =================== DB (versión con SQLAlchemy) ===================
-from sqlalchemy import create_engine, Column, Integer, String, DateTime
-from sqlalchemy.orm import declarative_base, sessionmaker
-from datetime import datetime
-import os
-
-# === Configuración del ORM ===
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "scores.db")
-
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
-Base = declarative_base()
-SessionLocal = sessionmaker(bind=engine)
-
-# === Definición del modelo ===
-class Score(Base):
-    __tablename__ = "scores"
+# =================== DB (models.py / services.py) ===================
+# El engine se crea recién al primer uso (importar el juego no toca la base)
+import services
+from services import save_scores, save_attempts
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String(30), nullable=False)
-    score = Column(Integer, nullable=False)
-    created_at = Column(DateTime, default=datetime.now)
-
-# Crear tabla si no existe
-Base.metadata.create_all(engine)
-
-# === Función para guardar un puntaje ===
 def save_score(name, score):
     """Guarda un puntaje en la base de datos."""
-    session = SessionLocal()
     try:
-        new_score = Score(name=name.strip()[:30], score=int(score))
-        session.add(new_score)
-        session.commit()
+        services.save_score(name, score)
     except Exception as e:
         print(f"⚠️ Error al guardar puntaje: {e}")
-        session.rollback()
-    finally:
-        session.close()
 
-# === Función para inicializar la base ===
-def init_db():
-    """Crea las tablas si no existen (compatibilidad)."""
-    Base.metadata.create_all(engine)
+def save_attempts_now(rows):
+    """Guarda una tanda de intentos por letra (sin ScoreWorker: una sola vez, al terminar la partida)."""
+    try:
+        save_attempts(rows)
+    except Exception as e:
+        print(f"⚠️ Error al guardar telemetría: {e}")
 
-# === Función para obtener el top 20 ===
-def get_top20(limit=20):
+def get_top20(limit=TOP_LIMIT):
     """Devuelve los puntajes más altos (nombre, puntaje, fecha)."""
-    session = SessionLocal()
-    try:
-        rows = (
-            session.query(Score.name, Score.score, Score.created_at)
-            .order_by(Score.score.desc(), Score.created_at.asc())
-            .limit(limit)
-            .all()
-        )
-        return [(r[0], r[1], r[2].strftime("%d/%m/%Y %H:%M:%S")) for r in rows]
-    finally:
-        session.close()
+    return services.get_top(limit)
 
 
 # =================== Game State ===================
-def reset_game_state(player_name):
-    words_queue = _new_words_queue()
+def letter_k(letter):
+    """Ventana (en etiquetas) para validar `letter`: se confirma con mayoría absoluta (k//2 + 1)."""
+    return LETTER_K.get(letter, K)
+
+class LabelWindow:
+    """Últimas k etiquetas con el conteo de cada una, actualizado al entrar y salir de la ventana.
+       Saber cuántas veces apareció una letra es una búsqueda en un dict, sin recorrer la ventana.
+    """
+    __slots__ = ("k", "labels", "counts")
+
+    def __init__(self, k=K):
+        self.k = k
+        self.labels = collections.deque()
+        self.counts = {}
+
+    def append(self, label):
+        if len(self.labels) >= self.k:
+            old = self.labels.popleft()
+            n = self.counts[old] - 1
+            if n:
+                self.counts[old] = n
+            else:
+                del self.counts[old]
+        self.labels.append(label)
+        self.counts[label] = self.counts.get(label, 0) + 1
+
+    def count(self, label):
+        return self.counts.get(label, 0)
+
+    def clear(self, k=None):
+        if k is not None:
+            self.k = k
+        self.labels.clear()
+        self.counts.clear()
+
+    def __len__(self):
+        return len(self.labels)
+
+class GameState:
+    """Estado de una partida. Con __slots__: atributos fijos, sin dict por instancia.
+       snapshot() copia el estado (checkpoints); to_dict()/from_dict() lo serializan a JSON.
+    """
+    __slots__ = ("player_name", "words", "score", "combo", "word_index", "target_word", "pos",
+                 "cooldown", "last_labels", "start_time", "last_letter_time", "penalty", "letter_times",
+                 "misses", "attempts")
+
+    def __init__(self, player_name, words, now):
+        self.player_name: str = player_name
+        self.words: list = words
+        self.score: int = 0
+        self.combo: float = 1.0
+        self.word_index: int = 0
+        self.target_word: str = words[0]
+        self.pos: int = 0
+        self.cooldown: int = 0
+        self.last_labels: LabelWindow = LabelWindow(letter_k(words[0][0]))
+        self.start_time: float = now
+        self.last_letter_time: float = now
+        self.penalty: int = 0
+        self.letter_times: list = []   # segundos que tardó cada letra confirmada
+        self.misses: int = 0           # etiquetas equivocadas en la letra actual
+        self.attempts: list = []       # telemetría: (t, palabra, letra, "hit"|"skip", segundos, fallos)
+
+    def time_left(self, now=None):
+        if now is None:
+            now = time.time()
+        return TIME_LIMIT - (now - self.start_time) - self.penalty
+
+    def to_dict(self):
+        d = {name: getattr(self, name) for name in self.__slots__}
+        d["words"] = list(self.words)
+        d["letter_times"] = list(self.letter_times)
+        d["attempts"] = [list(a) for a in self.attempts]
+        d["last_labels"] = {"k": self.last_labels.k, "labels": list(self.last_labels.labels)}
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        gs = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(gs, name, d[name])
+        gs.words = list(d["words"])
+        gs.letter_times = list(d["letter_times"])
+        gs.attempts = [tuple(a) for a in d["attempts"]]
+        gs.last_labels = LabelWindow(d["last_labels"]["k"])
+        for label in d["last_labels"]["labels"]:
+            gs.last_labels.append(label)
+        return gs
+
+    def snapshot(self):
+        return GameState.from_dict(self.to_dict())
+
+def reset_game_state(player_name, now=None):
+    if now is None:
+        now = time.time()
+    return GameState(player_name, _new_words_queue(), now)
+
+def _advance_word(gs, give_word_bonus=True, now=None):
+    if give_word_bonus:
+        gs.score += 250
+        gs.combo = min(gs.combo + 0.3, 3.0)
+    gs.word_index += 1
+    if gs.word_index >= len(gs.words):
+        gs.words = _new_words_queue()
+        gs.word_index = 0
+    gs.target_word = gs.words[gs.word_index]
+    gs.pos = 0
+    gs.cooldown = COOLDOWN + 10
+    gs.last_letter_time = time.time() if now is None else now
+
+def play_step(gs, label, now=None):
+    """Un frame de PLAY: cooldown, confirmación de la letra pedida y puntaje.
+       Devuelve (letra, puntos) si se confirmó una letra en este frame, o None.
+    """
+    if now is None:
+        now = time.time()
+    if gs.cooldown > 0:
+        gs.cooldown -= 1
+        return None
+
+    need = gs.target_word[gs.pos]
+    window = gs.last_labels
+    k = letter_k(need)
+    if window.k != k:
+        # cambió la letra pedida a una con otra ventana
+        window.clear(k)
+    if label:
+        window.append(label)
+
+    if label and window.count(need) >= (k//2 + 1):
+        elapsed = now - gs.last_letter_time
+        gs.last_letter_time = now
+        gs.letter_times.append(elapsed)
+        gs.attempts.append((now, gs.target_word, need, "hit", elapsed, gs.misses))
+        gs.misses = 0
+
+        base = 100
+        bonus = speed_bonus(elapsed)
+        score_gain = int((base + bonus) * gs.combo)
+        gs.score += score_gain
+        gs.combo = min(gs.combo + 0.1, 3.0)
+
+        gs.pos += 1
+        gs.cooldown = COOLDOWN
+        gs.last_labels.clear()
+
+        if gs.pos == len(gs.target_word):
+            _advance_word(gs, give_word_bonus=True, now=now)
+        return need, score_gain
+    elif label and label != need:
+        gs.combo = max(1.0, gs.combo - 0.3)
+        gs.misses += 1
+    return None
+
+def replay_game(path, player_name="replay", seed=0):
+    """Reproduce una grabación de landmarks (replay.py) sobre el motor y el puntaje de PLAY,
+       sin cámara, ventana ni MediaPipe. Devuelve el estado final de la partida.
+    """
+    W, H, records = load_recording(path)
+    engine = LetterEngine(cam_w=W, cam_h=H, use_mediapipe=False)
+    random.seed(seed)
+    gs = None
+    for t, label in replay_frames(records, engine):
+        if gs is None:
+            gs = reset_game_state(player_name, now=t)
+        if gs.time_left(t) <= 0:
+            break
+        play_step(gs, label, now=t)
+    return gs
+
+def apply_skip(gs, now=None):
+    if now is None:
+        now = time.time()
+    gs.attempts.append((now, gs.target_word, gs.target_word[gs.pos], "skip", now - gs.last_letter_time, gs.misses))
+    gs.misses = 0
+    gs.penalty += 5
+    gs.pos += 1
+    gs.last_labels.clear()
+    gs.combo = 1.0
+    gs.cooldown = COOLDOWN
+    if gs.pos >= len(gs.target_word):
+        _advance_word(gs, give_word_bonus=False, now=now)
+
+# =================== Máquina de estados ===================
+_QUIT_KEYS = frozenset((27, ord('q'), ord('Q')))
+_SKIP_KEYS = frozenset((ord('s'), ord('S')))
+_REPLAY_KEYS = frozenset((ord('r'), ord('R')))
+
+class GameSession:
+    """Estados START | PLAY | END sin ventana ni cámara.
+       main() le pasa en cada frame la etiqueta, la tecla y el click y dibuja según el estado;
+       simulate() la maneja con una lista de eventos.
+       scores: ScoreWorker opcional; con él, guardar y releer el top no bloquea el frame.
+       Los intentos por letra (gs.attempts) se guardan en tandas: cada TELEMETRY_FLUSH segundos
+       por el ScoreWorker y lo que quede al terminar la partida.
+    """
+    def __init__(self, size=(1920, 1080), use_db=USE_DB, scores=None):
+        self.use_db = use_db
+        self.scores = scores
+        self.state = "START"
+        self.player_name = ""
+        self.input_focus = True  # para el cuadro de nombre
+        self.gs = None
+        self.running = True
+        self.timeline = []       # (t, evento, dato): start / letter / skip / end
+        self._attempts_sent = 0  # cuántos gs.attempts ya se mandaron a guardar
+        self._attempts_flush_t = 0.0
+        self._top_rows = get_top20() if use_db and scores is None else []
+        self._size = None
+        self.layout(*size)
+
+    def layout(self, W, H):
+        """Recalcula los rectángulos clickeables si cambió el tamaño del frame."""
+        if self._size != (W, H):
+            self._size = (W, H)
+            self.box_rect, self.btn_rect = start_menu_layout(W, H)
+            self.replay_rect, self.quit_rect = end_menu_layout(W, H)
+            self.skip_rect = skip_button_layout(W, H)
+
+    @property
+    def top_rows(self):
+        # con ScoreWorker: el último top publicado (se actualiza solo cuando termina de guardar)
+        return self.scores.top_rows if self.scores is not None else self._top_rows
+
+    @property
+    def recognize(self):
+        # solo hace falta reconocer jugando y fuera del cooldown
+        return self.state == "PLAY" and self.gs.cooldown == 0
+
+    def step(self, now, label="", key=-1, click=None):
+        """Avanza un frame. key: código crudo de waitKeyEx/waitKey (-1: ninguna); click: (x, y) o None.
+           Devuelve (letra, puntos) si se confirmó una letra en este frame, o None.
+        """
+        if self.state == "START":
+            self._step_start(now, key, click)
+        elif self.state == "PLAY":
+            return self._step_play(now, label, key, click)
+        else:
+            self._step_end(key, click)
+        return None
+
+    def _start_game(self, now):
+        self.gs = reset_game_state(self.player_name, now=now)
+        self.state = "PLAY"
+        self.timeline.append((now, "start", self.player_name))
+        self._attempts_sent = 0
+        self._attempts_flush_t = now
+
+    def _flush_attempts(self, now):
+        # una sola tanda con los intentos nuevos; sin ScoreWorker solo se llama al final
+        gs = self.gs
+        rows = [(gs.player_name,) + tuple(a) for a in gs.attempts[self._attempts_sent:]]
+        self._attempts_sent = len(gs.attempts)
+        self._attempts_flush_t = now
+        if not rows:
+            return
+        if self.scores is not None:
+            self.scores.submit_attempts(rows)
+        elif self.use_db:
+            save_attempts_now(rows)
+
+    def _finish_game(self, now):
+        # guardar telemetría y score y pasar a END
+        self._flush_attempts(now)
+        if self.scores is not None:
+            self.scores.submit(self.gs.player_name, self.gs.score)
+        elif self.use_db:
+            save_score(self.gs.player_name, int(self.gs.score))
+            self._top_rows = get_top20()
+        self.state = "END"
+        self.timeline.append((now, "end", int(self.gs.score)))
+
+    def _skip(self, now):
+        self.timeline.append((now, "skip", self.gs.target_word[self.gs.pos]))
+        apply_skip(self.gs, now=now)
+
+    def _step_start(self, now, key, click):
+        can_start = len(self.player_name.strip()) > 0
+
+        # Clicks
+        if click is not None:
+            x, y = click
+            if point_in_rect(x, y, self.box_rect):
+                self.input_focus = True
+            elif point_in_rect(x, y, self.btn_rect) and can_start:
+                self._start_game(now)
+                return
+
+        # Teclado (START)
+        if key == -1:
+            return
+        key = key & 0xFFFFFFFF  # preserva el código, sin convertir -1 a 255
+
+        if key == 27:  # ESC
+            self.running = False
+
+        elif key in (13, 10):  # ENTER / RETURN
+            if can_start:
+                self._start_game(now)
+
+        elif self.input_focus:
+            # Backspace en distintas plataformas
+            if key in (8, 127):   # 8=Win, 127=Unix
+                self.player_name = self.player_name[:-1]
+
+            else:
+                # Caracter imprimible básico
+                try:
+                    ch = chr(key)
+                except (ValueError, OverflowError):
+                    ch = ""
+
+                # Filtramos a visibles estándar + espacio
+                if ch and 32 <= ord(ch) <= 126 and len(self.player_name) < 30:
+                    self.player_name += ch
+
+    def _step_play(self, now, label, key, click):
+        gs = self.gs
+        if gs.time_left(now) <= 0:
+            self._finish_game(now)
+            return None
+
+        hit = play_step(gs, label, now=now)
+        if hit is not None:
+            self.timeline.append((now, "letter", hit))
+        if self.scores is not None and now - self._attempts_flush_t >= TELEMETRY_FLUSH:
+            self._flush_attempts(now)
+
+        # Click saltear
+        if click is not None and point_in_rect(click[0], click[1], self.skip_rect):
+            self._skip(now)
+            if gs.time_left(now) <= 0:
+                self._finish_game(now)
+
+        # Teclas globales (casi todos los frames no traen tecla)
+        if key == -1:
+            return hit
+        key = key & 0xFF
+        if key in _QUIT_KEYS:
+            self.running = False
+        if key in _SKIP_KEYS and self.state == "PLAY":
+            self._skip(now)
+        return hit
+
+    def _step_end(self, key, click):
+        if click is not None:
+            x, y = click
+            if point_in_rect(x, y, self.replay_rect):
+                # volver a START para escribir otro nombre o reusar el mismo
+                self.state = "START"
+            elif point_in_rect(x, y, self.quit_rect):
+                self.running = False
+
+        if key == -1:
+            return
+        key = key & 0xFF
+        if key in _QUIT_KEYS:
+            self.running = False
+        if key in _REPLAY_KEYS:
+            self.state = "START"
+
+def simulate(events, size=(1920, 1080), use_db=False, seed=None, scores=None):
+    """Juego completo sin GUI ni cámara, manejado por eventos (t, label, key, click).
+       key: código de tecla o -1/None; click: (x, y) o None. Las etiquetas que llegan
+       mientras no se reconoce (menús, cooldown) se descartan, como hace el motor.
+       Devuelve {"score", "state", "timeline"}.
+       Una partida de 75 s a 30 fps (~2400 frames) tarda ~4-5 ms en un núcleo (~200-250 partidas/s).
+    """
+    if seed is not None:
+        random.seed(seed)
+    game = GameSession(size, use_db=use_db, scores=scores)
+    for t, label, key, click in events:
+        if not game.recognize:
+            label = ""
+        game.step(t, label, -1 if key is None else key, click)
+        if not game.running:
+            break
     return {
-        "player_name": player_name,
-        "words": words_queue,
-        "score": 0,
-        "combo": 1.0,
-        "word_index": 0,
-        "target_word": words_queue[0],
-        "pos": 0,
-        "cooldown": 0,
-        "last_labels": collections.deque(maxlen=K),
-        "start_time": time.time(),
-        "last_letter_time": time.time(),
-        "penalty": 0
+        "score": int(game.gs.score) if game.gs is not None else 0,
+        "state": game.state,
+        "timeline": game.timeline,
     }
 
-def _advance_word(gs, give_word_bonus=True):
-    if give_word_bonus:
-        gs["score"] += 250
-        gs["combo"] = min(gs["combo"] + 0.3, 3.0)
-    gs["word_index"] += 1
-    if gs["word_index"] >= len(gs["words"]):
-        gs["words"] = _new_words_queue()
-        gs["word_index"] = 0
-    gs["target_word"] = gs["words"][gs["word_index"]]
-    gs["pos"] = 0
-    gs["cooldown"] = COOLDOWN + 10
-    gs["last_letter_time"] = time.time()
-
-def apply_skip(gs):
-    gs["penalty"] += 5
-    gs["pos"] += 1
-    gs["last_labels"].clear()
-    gs["combo"] = 1.0
-    gs["cooldown"] = COOLDOWN
-    if gs["pos"] >= len(gs["target_word"]):
-        _advance_word(gs, give_word_bonus=False)
-
 # =================== Main Loop ===================
-def main():
+def take_key(pending, key, consume=True):
+    """Cola de teclas entre frames: `key` (-1 = ninguna) se encola y, con consume, sale la más vieja.
+       Así no se pierde nada de lo que se tipea mientras el pipeline todavía no entregó otro frame.
+    """
+    if key != -1:
+        pending.append(key)
+    if consume and pending:
+        return pending.popleft()
+    return -1
+
+def main(pipelined=PIPELINED):
     global _last_click
     random.seed()
 
@@ -291,160 +715,101 @@ def main():
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
 
-    engine = LetterEngine()
+    engine = LetterEngine(infer_every=INFER_EVERY, idle_every=IDLE_EVERY, infer_width=INFER_WIDTH)
+    if RECORD_PATH:
+        engine.recorder = LandmarkRecorder(RECORD_PATH, int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                                           int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
 
     # Estados: START | PLAY | END
-    state = "START"
-    player_name = ""
-    input_focus = True  # para el cuadro de nombre
-    gs = None
+    scores = ScoreWorker(save_scores, get_top20, save_attempts=save_attempts).start() if USE_DB else None
+    game = GameSession(use_db=USE_DB, scores=scores)
     prev_t = cv2.getTickCount()
 
-    top_rows_cache = get_top20() if USE_DB else []
+    pipe = FramePipeline(cap, engine).start() if pipelined else None
+    frame_buf = None
+    frame_shape = (1080, 1920, 3)        # tamaño del lienzo negro si la cámara no entrega frame
+    pending_keys = collections.deque()   # teclas que llegaron mientras no había frame nuevo
+    heartbeat = Heartbeat.from_env()   # solo si lo lanzó app.py (supervisor)
 
     while True:
-        ok, frame = cap.read()
-        if not ok:
-            # si no hay frame, dibujamos un lienzo negro para seguir con UI
-            frame = (255 * (0 * 0)).__class__()
-            frame = 255 * 0
+        recognize = game.recognize
+        if pipe is not None:
+            pipe.recognize = recognize
+            result = pipe.get()
+            if result is None:
+                # todavía no hay frame nuevo: atender la ventana y guardar la tecla para el próximo
+                key = cv2.waitKeyEx(1) if game.state == "START" else cv2.waitKey(1)
+                if key != -1 and key & 0xFF == 27:
+                    break
+                take_key(pending_keys, key, consume=False)
+                continue
+            label, annotated = result
+        else:
+            ok, frame = cap.read(frame_buf)  # reusa el buffer del frame anterior
+            frame_buf = frame if ok else None
+            if ok:
+                frame_shape = frame.shape
+            else:
+                # si no hay frame, dibujamos un lienzo negro (del último tamaño) para seguir con UI
+                frame = np.zeros(frame_shape, np.uint8)
 
-        label, annotated = engine.process_frame(frame)
+            label, annotated = engine.process_frame(frame, recognize=recognize)
+        ui_t0 = time.perf_counter()
 
-        # FPS (opcional)
+        # FPS (opcional) + latencia por etapa en modo pipeline
         t = cv2.getTickCount()
         fps = cv2.getTickFrequency() / max(1, (t - prev_t))
         prev_t = t
-        cv2.putText(annotated, f"FPS: {fps:.1f}", (20, 40), FONT, 0.9, (255,255,255), 2, cv2.LINE_AA)
-
-        if state == "START":
-            box_rect, btn_rect, can_start = draw_start_menu(annotated, player_name, input_focus)
-
-            # Clicks
-            if _last_click is not None:
-                x, y = _last_click
-                _last_click = None
-                if point_in_rect(x, y, box_rect):
-                    input_focus = True
-                elif point_in_rect(x, y, btn_rect) and can_start:
-                    gs = reset_game_state(player_name)
-                    state = "PLAY"
-
-            # Teclado (START)
-            raw = cv2.waitKeyEx(30)   # mejor que waitKey para códigos extendidos
-            if raw != -1:
-                key = raw & 0xFFFFFFFF  # preserva el código, sin convertir -1 a 255
-
-                if key == 27:  # ESC
-                    break
-
-                elif key in (13, 10):  # ENTER / RETURN
-                    if can_start:
-                        gs = reset_game_state(player_name)
-                        state = "PLAY"
-
-                elif input_focus:
-                    # Backspace en distintas plataformas
-                    if key in (8, 127):   # 8=Win, 127=Unix
-                        player_name = player_name[:-1]
-
-                    else:
-                        # Caracter imprimible básico
-                        try:
-                            ch = chr(key)
-                        except (ValueError, OverflowError):
-                            ch = ""
-
-                        # Filtramos a visibles estándar + espacio
-                        if ch and 32 <= ord(ch) <= 126 and len(player_name) < 30:
-                            player_name += ch
-
-
-        elif state == "PLAY":
-            time_left = TIME_LIMIT - (time.time() - gs["start_time"]) - gs["penalty"]
-            if time_left <= 0:
-                # guardar score y pasar a END
-                if USE_DB:
-                    save_score(gs["player_name"], int(gs["score"]))
-                    top_rows_cache = get_top20()
-                state = "END"
-            else:
-                if gs["cooldown"] > 0:
-                    gs["cooldown"] -= 1
-                else:
-                    need = gs["target_word"][gs["pos"]]
-                    if label:
-                        gs["last_labels"].append(label)
-
-                    if label and sum(1 for x in gs["last_labels"] if x == need) >= (K//2 + 1):
-                        elapsed = time.time() - gs["last_letter_time"]
-                        gs["last_letter_time"] = time.time()
-
-                        base = 100
-                        bonus = speed_bonus(elapsed)
-                        score_gain = int((base + bonus) * gs["combo"])
-                        gs["score"] += score_gain
-                        gs["combo"] = min(gs["combo"] + 0.1, 3.0)
-
-                        gs["pos"] += 1
-                        gs["cooldown"] = COOLDOWN
-                        gs["last_labels"].clear()
-
-                        # Feedback
-                        cv2.putText(annotated, f"{need}", (60,160), FONT, 3.2, (0,255,0), 7, cv2.LINE_AA)
-                        cv2.putText(annotated, f"+{score_gain}", (60,240), FONT, 1.6, (0,255,0), 5, cv2.LINE_AA)
-
-                        if gs["pos"] == len(gs["target_word"]):
-                            _advance_word(gs, give_word_bonus=True)
-                    elif label and label != need:
-                        gs["combo"] = max(1.0, gs["combo"] - 0.3)
-
-                # Dibujo HUD primero
-                draw_hud(annotated, gs["target_word"], gs["pos"], int(gs["score"]), time_left, round(gs["combo"],1), label)
-                # Botón Saltear encima
-                skip_rect = draw_skip_button(annotated)
-
-                # Click saltear
-                if _last_click is not None:
-                    x, y = _last_click
-                    _last_click = None
-                    if point_in_rect(x, y, skip_rect):
-                        apply_skip(gs)
-                        time_left = TIME_LIMIT - (time.time() - gs["start_time"]) - gs["penalty"]
-                        if time_left <= 0:
-                            if USE_DB:
-                                save_score(gs["player_name"], int(gs["score"]))
-                                top_rows_cache = get_top20()
-                            state = "END"
-
-                # Teclas globales
-                key = cv2.waitKey(1) & 0xFF
-                if key == 27 or key in (ord('q'), ord('Q')):
-                    break
-                if key in (ord('s'), ord('S')):
-                    apply_skip(gs)
-
-        elif state == "END":
-            replay_rect, quit_rect = draw_end_menu(annotated, int(gs["score"]), gs["player_name"], top_rows_cache if USE_DB else None)
-
-            if _last_click is not None:
-                x, y = _last_click
-                _last_click = None
-                if point_in_rect(x, y, replay_rect):
-                    # volver a START para escribir otro nombre o reusar el mismo
-                    state = "START"
-                elif point_in_rect(x, y, quit_rect):
-                    break
-
-            key = cv2.waitKey(1) & 0xFF
-            if key == 27 or key in (ord('q'), ord('Q')):
-                break
-            if key in (ord('r'), ord('R')):
-                state = "START"
+        fps_text = f"FPS: {fps:.1f}"
+        if pipe is not None:
+            fps_text += "  " + pipe.stats.text()
+        cv2.putText(annotated, fps_text, (20, 40), FONT, 0.9, (255,255,255), 2, cv2.LINE_AA)
+
+        # Entrada (START usa waitKeyEx para códigos extendidos) + paso de la máquina de estados
+        H, W, _ = annotated.shape
+        game.layout(W, H)
+        click, _last_click = _last_click, None
+        key = take_key(pending_keys, cv2.waitKeyEx(30) if game.state == "START" else cv2.waitKey(1))
+        hit = game.step(time.time(), label, key, click)
+        if not game.running:
+            break
+        if heartbeat is not None:
+            heartbeat.update(state=game.state, fps=round(fps, 1), score=int(game.gs.score) if game.gs else 0,
+                             stages_ms=pipe.stats.snapshot() if pipe is not None else None)
+
+        if game.state == "START":
+            draw_start_menu(annotated, game.player_name, game.input_focus)
+
+        elif game.state == "PLAY":
+            gs = game.gs
+            if hit is not None:
+                # Feedback
+                need, score_gain = hit
+                cv2.putText(annotated, f"{need}", (60,160), FONT, 3.2, (0,255,0), 7, cv2.LINE_AA)
+                cv2.putText(annotated, f"+{score_gain}", (60,240), FONT, 1.6, (0,255,0), 5, cv2.LINE_AA)
+
+            # Dibujo HUD primero
+            draw_hud(annotated, gs.target_word, gs.pos, int(gs.score), gs.time_left(), round(gs.combo,1), label)
+            # Botón Saltear encima
+            draw_skip_button(annotated)
+
+        elif game.state == "END":
+            draw_end_menu(annotated, int(game.gs.score), game.gs.player_name, game.top_rows if USE_DB else None)
 
         # Mostrar frame
         cv2.imshow("Senas & Palabras", annotated)
-
+        engine.release_frame(annotated)
+        if pipe is not None:
+            pipe.stats.add("ui", time.perf_counter() - ui_t0)
+
+    if pipe is not None:
+        pipe.stop()
+    if engine.recorder is not None:
+        engine.recorder.close()
+    if scores is not None:
+        scores.stop()
+    if heartbeat is not None:
+        heartbeat.close()
     cap.release()
     cv2.destroyAllWindows()
 
@@ -0,0 +1,207 @@
+import collections
+import json
+import random
+
+import numpy as np
+import pytest
+import cv2
+
+import tpi_juego as G
+from hand_corpus import W, H, landmark_corpus
+from replay import LandmarkRecorder
+from score_worker import ScoreWorker
+from tpi_letras import FRAME_HAND, FRAME_NONE, landmarks_to_px
+
+
+def _frame(seed=0):
+    return np.random.default_rng(seed).integers(0, 255, (H, W, 3), dtype=np.uint8)
+
+
+def test_hud_cacheado_igual_al_dibujo_directo():
+    base = _frame()
+    direct, cached = base.copy(), base.copy()
+    G._render_hud_static(direct)
+    G._render_hud_word(direct, "CAMION", 2)
+    G._render_hud_stats(direct, 1500, 33.2, 1.3, "A")
+    r_direct = G._render_skip_button(direct)
+    for _ in range(2):  # la segunda vuelta ya usa las capas cacheadas
+        cached = base.copy()
+        G.draw_hud(cached, "CAMION", 2, 1500, 33.2, 1.3, "A")
+        r_cached = G.draw_skip_button(cached)
+    assert r_direct == r_cached
+    assert np.abs(direct.astype(int) - cached).max() <= 1
+
+
+def test_menu_final_cacheado_igual_al_dibujo_directo():
+    rows = [("jugador%d" % i, 1000 - i, "2025-01-01") for i in range(20)]
+    base = _frame(1)
+    direct = base.copy()
+    cv2.addWeighted(direct, 0.35, direct, 0.0, 0, dst=direct)
+    r_direct = G._render_end_menu(direct, 1234, "Ana", rows)
+    cached = base.copy()
+    r_cached = G.draw_end_menu(cached, 1234, "Ana", rows)
+    assert r_direct == r_cached
+    assert np.abs(direct.astype(int) - cached).max() <= 1
+
+
+def test_play_step_confirma_letra_con_mayoria_y_suma_puntos():
+    gs = G.reset_game_state("test", now=100.0)
+    gs.cooldown = 0
+    need = gs.target_word[0]
+    hits = [G.play_step(gs, need, now=100.5) for _ in range(G.K // 2 + 1)]
+    assert hits[:-1] == [None] * (G.K // 2)
+    assert hits[-1] == (need, int((100 + G.speed_bonus(0.5)) * 1.0))
+    assert gs.pos == 1 and gs.cooldown == G.COOLDOWN and not gs.last_labels
+
+
+def test_replay_game_es_deterministico(tmp_path):
+    path = str(tmp_path / "sesion.lmk")
+    rec = LandmarkRecorder(path, W, H)
+    t = 0.0
+    for hand, _, _ in landmark_corpus(n=300, seed=3):
+        pts = landmarks_to_px(hand, W, H)
+        for _ in range(15):
+            rec.write(t, FRAME_HAND, pts)
+            t += 1 / 30
+        rec.write(t, FRAME_NONE)
+        t += 1 / 30
+    rec.close()
+
+    a = G.replay_game(path, seed=5)
+    b = G.replay_game(path, seed=5)
+    assert a.score == b.score and a.pos == b.pos and a.word_index == b.word_index
+    assert a.score > 0
+
+
+def test_label_window_cuenta_igual_que_recorrer_la_ventana():
+    rng = random.Random(2)
+    window, ref = G.LabelWindow(7), collections.deque(maxlen=7)
+    for _ in range(500):
+        label = rng.choice("ABCD")
+        window.append(label)
+        ref.append(label)
+        assert all(window.count(x) == ref.count(x) for x in "ABCDE")
+    window.clear(3)
+    assert len(window) == 0 and window.k == 3 and window.count("A") == 0
+
+
+def test_k_por_letra(monkeypatch):
+    monkeypatch.setitem(G.LETTER_K, "A", 4)
+    gs = G.reset_game_state("test", now=0.0)
+    gs.target_word, gs.pos, gs.cooldown = "AB", 0, 0
+    assert [G.play_step(gs, "A", now=1.0) for _ in range(3)][-1] == ("A", int((100 + G.speed_bonus(1.0)) * 1.0))
+    assert gs.last_labels.k == 4
+    gs.cooldown = 0
+    G.play_step(gs, "B", now=2.0)
+    assert gs.last_labels.k == G.K   # la B usa la ventana por defecto
+
+
+def test_game_state_snapshot_y_serializacion():
+    gs = G.reset_game_state("ana", now=10.0)
+    gs.cooldown = 0
+    need = gs.target_word[0]
+    G.play_step(gs, need, now=11.0)
+    snap = gs.snapshot()
+    restored = G.GameState.from_dict(json.loads(json.dumps(gs.to_dict())))
+    for _ in range(G.K):
+        G.play_step(gs, need, now=12.0)
+    assert snap.pos == 0 and snap.last_labels.count(need) == 1   # el snapshot no cambia con la partida
+    assert restored.to_dict() == snap.to_dict()
+    for other in (snap, restored):
+        for _ in range(G.K):
+            G.play_step(other, need, now=12.0)
+        assert other.to_dict() == gs.to_dict()
+    assert gs.letter_times == [2.0]
+    assert not hasattr(gs, "__dict__")
+
+
+def _keys(t, text):
+    return [(t, "", ord(ch), None) for ch in text]
+
+
+def test_simulate_partida_completa(monkeypatch):
+    monkeypatch.setattr(G, "WORDS", ["AB"])
+    events = _keys(0.0, "ana") + [(0.0, "", 13, None)]
+    for i in range(int(G.TIME_LIMIT * 30) + 10):
+        events.append((1.0 + i / 30, "AB"[(i // 40) % 2], -1, None))
+    events.append((200.0, "", ord("q"), None))
+
+    result = G.simulate(events, seed=1)
+    kinds = [kind for _, kind, _ in result["timeline"]]
+    letters = [value[0] for _, kind, value in result["timeline"] if kind == "letter"]
+    assert kinds[0] == "start" and kinds[-1] == "end"
+    assert letters[:4] == ["A", "B", "A", "B"]
+    assert result["state"] == "END" and result["score"] == result["timeline"][-1][2] > 0
+
+
+def test_simulate_click_en_saltear_penaliza():
+    x1, y1, x2, y2 = G.skip_button_layout(1920, 1080)
+    click = ((x1 + x2) // 2, (y1 + y2) // 2)
+    events = _keys(0.0, "bo") + [(0.0, "", 10, None), (1.0, "", -1, click), (1.1, "", None, None)]
+    result = G.simulate(events, seed=1)
+    assert [kind for _, kind, _ in result["timeline"]] == ["start", "skip"]
+    assert result["state"] == "PLAY" and result["score"] == 0
+
+
+def test_simulate_sin_nombre_no_arranca():
+    x1, y1, x2, y2 = G.start_menu_layout(1920, 1080)[1]
+    events = [(0.0, "", 13, None), (0.1, "", -1, (x1 + 1, y1 + 1)), (0.2, "", 27, None), (0.3, "", ord("x"), None)]
+    result = G.simulate(events)
+    assert result == {"score": 0, "state": "START", "timeline": []}
+
+
+def test_simulate_guarda_el_puntaje_en_segundo_plano(monkeypatch):
+    saved = []
+    scores = ScoreWorker(saved.extend, lambda: sorted(saved, key=lambda r: -r[1])).start()
+    monkeypatch.setattr(G, "TIME_LIMIT", 1)
+    events = _keys(0.0, "eva") + [(0.0, "", 13, None), (5.0, "", -1, None)]
+    result = G.simulate(events, scores=scores)
+    scores.flush()
+    assert result["state"] == "END"
+    assert saved == [("eva", 0)] and scores.top_rows == [("eva", 0)]
+    scores.stop()
+
+
+class _FakeScores:
+    top_rows = []
+
+    def __init__(self):
+        self.attempt_batches = []
+
+    def submit(self, name, score):
+        pass
+
+    def submit_attempts(self, rows):
+        self.attempt_batches.append(rows)
+
+
+def test_simulate_junta_intentos_por_letra_y_los_manda_en_tandas(monkeypatch):
+    scores = _FakeScores()
+    monkeypatch.setattr(G, "WORDS", ["AB"])
+    monkeypatch.setattr(G, "TIME_LIMIT", 30)
+    x1, y1, x2, y2 = G.skip_button_layout(1920, 1080)
+    events = _keys(0.0, "ana") + [(0.0, "", 13, None)]
+    events += [(1.0 + i / 30, "C" if i < 5 else "A", -1, None) for i in range(40)]   # 5 fallos y la A
+    events += [(20.0, "", -1, ((x1 + x2) // 2, (y1 + y2) // 2))]                      # saltea la B
+    events += [(40.0, "", -1, None)]
+    result = G.simulate(events, scores=scores)
+
+    assert result["state"] == "END"
+    # una tanda por TELEMETRY_FLUSH (10 s de juego) y lo que queda al terminar;
+    # las A que siguen después del cooldown cuentan como fallos de la B
+    batches = scores.attempt_batches
+    misses_b = 40 - 5 - (G.K // 2 + 1) - G.COOLDOWN
+    assert [[(r[2], r[3], r[4], r[6]) for r in batch] for batch in batches] == [
+        [("AB", "A", "hit", 5)], [("AB", "B", "skip", misses_b)]]
+    hit, skip = batches[0][0], batches[1][0]
+    assert hit[0] == "ana" and hit[5] == pytest.approx(hit[1])   # desde el arranque en t=0
+    assert skip[5] == pytest.approx(20.0 - hit[1])
+
+
+def test_take_key_no_pierde_teclas_entre_frames():
+    pending = collections.deque()
+    for key in (ord("a"), -1, ord("n"), ord("a"), 13):   # llegan sin frame nuevo
+        assert G.take_key(pending, key, consume=False) == -1
+    typed = [G.take_key(pending, -1) for _ in range(5)]
+    assert typed == [ord("a"), ord("n"), ord("a"), 13, -1]
+    assert G.take_key(pending, ord("s")) == ord("s")
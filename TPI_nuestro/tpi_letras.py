@@ -6,6 +6,7 @@ import cv2
 import math
 import collections
 import mediapipe as mp
+import numpy as np
 import time
 
 # -------------------- Utils geométricas --------------------
@@ -64,6 +65,145 @@ def roughly_vertical(a, b, min_ratio=0.90):
 def between(v, a, b):  # v dentro del rango [min(a,b), max(a,b)]
     return min(a, b) <= v <= max(a, b)
 
+# -------------------- Features vectorizados --------------------
+# Vectores entre landmarks (b - a) que usan las reglas; en un lote se calculan todos
+# juntos con NumPy, con una sola mano en Python puro (con 21 puntos los arrays no compensan).
+# Los 13 primeros también se exponen como distancia normalizada por escala.
+DIFF_PAIRS = (
+    ("idx_mid_gap", 8, 12),
+    ("mid_rng_gap", 12, 16),
+    ("rng_pky_gap", 16, 20),
+    ("thumb_wrist", 4, 0),
+    ("thumb_idx5", 4, 5),
+    ("thumb_idx6", 4, 6),
+    ("thumb_idx8", 4, 8),
+    ("thumb_mid10", 4, 10),
+    ("thumb_mid12", 4, 12),
+    ("thumb_rng16", 4, 16),
+    ("thumb_pky20", 4, 20),
+    ("idx8_idx6", 8, 6),    # punta -> PIP índice
+    ("idx8_idx5", 8, 5),
+    ("mid12_mid10", 12, 10),  # punta -> PIP medio
+    ("rng16_rng14", 16, 14),  # punta -> PIP anular
+    ("pky20_pky18", 20, 18),  # punta -> PIP meñique
+)
+_DIFF_A = np.array([a for _, a, _ in DIFF_PAIRS])
+_DIFF_B = np.array([b for _, _, b in DIFF_PAIRS])
+_DIFF_AB = tuple((a, b) for _, a, b in DIFF_PAIRS)
+# landmarks que lee hand_features (pares de DIFF_PAIRS + los que usa directo)
+_USED_LANDMARKS = tuple(sorted({i for pair in _DIFF_AB for i in pair} | {0, 4, 6, 8, 12, 16, 20}))
+
+FEATURE_FLOATS = tuple(name for name, _, _ in DIFF_PAIRS[:13]) + (
+    "thumb_idx6_dy",    # |pulgar.y - índice PIP.y| / escala
+    "idx_thumb_dy",     # |índice.y - pulgar.y| / escala
+    "idx_mid_dy",       # |índice.y - medio.y| / escala
+    "idx_mid_dx",       # |índice.x - medio.x| / escala
+    "idx_hr", "mid_hr", "rng_hr", "pky_hr",  # horiz_ratio(punta, PIP) por dedo
+    "angle_L",          # ángulo pulgar-MCP índice-punta índice (grados)
+    "o_radius",         # radio medio de las 5 puntas a su centro
+    "o_spread",         # desvío medio respecto de ese radio
+)
+FEATURE_FLAGS = (
+    "idx_ext", "mid_ext", "rng_ext", "pky_ext", "thb_ext",
+    "idx_above_thumb", "mid_above_thumb", "rng_above_thumb", "pky_above_thumb",
+    "rng_below_thumb",
+    "thumb_below_idx6",  # pulgar por debajo del PIP del índice
+    "idx_above_wrist",   # punta índice sobre la muñeca (G)
+    "idx_below_wrist",   # punta índice bajo la muñeca (P, Q)
+    "idx_higher_mid",    # índice más alto que el medio (R)
+    "thumb_over_idx",    # pulgar sobre la punta del índice (S)
+    "thumb_between_xy",  # pulgar entre índice y medio (T)
+    "idx_curled",        # índice en gancho (X)
+)
+HandFeatures = collections.namedtuple("HandFeatures", FEATURE_FLOATS + FEATURE_FLAGS)
+
+def landmarks_to_px(hand_landmarks, W, H):
+    """Convierte los 21 landmarks a un array (21, 2) de enteros en píxeles (igual que lm_px)."""
+    xy = np.fromiter([v for lm in hand_landmarks.landmark for v in (lm.x, lm.y)], np.float64)
+    return (xy.reshape(-1, 2) * (W, H)).astype(np.int64)
+
+def _trunc(v):
+    # int() de Python o su equivalente por elemento
+    return v.astype(np.int64) if isinstance(v, np.ndarray) else int(v)
+
+def _angle_deg(dot, n1, n2):
+    # misma cuenta que angle(), a partir del producto escalar y las normas
+    if isinstance(dot, np.ndarray):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cosv = np.clip(dot / (n1 * n2), -1.0, 1.0)
+            return np.where((n1 == 0) | (n2 == 0), 0.0, np.degrees(np.arccos(cosv)))
+    if n1 == 0 or n2 == 0: return 0.0
+    return math.degrees(math.acos(max(-1.0, min(1.0, dot/(n1*n2)))))
+
+def hand_features(pts, scale_h, wrist_y_for_down):
+    """
+    Calcula todo lo que usan las reglas del clasificador.
+    pts: (21, 2) o (N, 21, 2) en píxeles. Con una sola mano los campos de
+    HandFeatures son escalares de Python; con un lote, arrays (N,).
+    """
+    pts = np.asarray(pts, dtype=np.int64)
+    if pts.ndim == 2:
+        # una mano: listas y escalares de Python (NumPy no compensa con 21 puntos)
+        xs, ys = pts.T.tolist()
+        return _hand_features_py(xs, ys, scale_h, wrist_y_for_down)
+    # lote: todos los vectores entre landmarks en una sola pasada
+    d = pts.take(_DIFF_B, axis=-2) - pts.take(_DIFF_A, axis=-2)
+    xs, ys = np.moveaxis(pts, (-1, -2), (0, 1))
+    d = np.moveaxis(d, (-2, -1), (0, 1))
+    scale_h = np.asarray(scale_h, dtype=np.float64)
+    wrist_y_for_down = np.asarray(wrist_y_for_down, dtype=np.float64)
+    return _features(xs, ys, d, np.maximum(1.0, scale_h), scale_h, wrist_y_for_down)
+
+def _hand_features_py(xs, ys, scale_h, wrist_y_for_down):
+    # una mano en listas de enteros: los vectores de DIFF_PAIRS y las cuentas de _features()
+    d = [(xs[b] - xs[a], ys[b] - ys[a]) for a, b in _DIFF_AB]
+    return _features(xs, ys, d, max(1.0, scale_h), scale_h, wrist_y_for_down)
+
+def _features(xs, ys, d, s, scale_h, wrist_y_for_down):
+    # cuentas comunes: valen con escalares de Python (una mano) y con arrays (lote);
+    # desenrolladas con nombres: con una sola mano cada comprensión extra se nota
+    n = [(dx*dx + dy*dy) ** 0.5 for dx, dy in d[:13]]  # igual que euclid()
+    n4, n12 = n[4], n[12]
+    dist3, dist4 = n[3] / s, n4 / s
+    (dx11, dy11), (dx13, dy13), (dx14, dy14), (dx15, dy15) = d[11], d[13], d[14], d[15]  # punta -> PIP
+    y0, x4, y4, y6, x8, y8 = ys[0], xs[4], ys[4], ys[6], xs[8], ys[8]
+    x12, y12, x16, y16, x20, y20 = xs[12], ys[12], xs[16], ys[16], xs[20], ys[20]
+
+    # L: ángulo en el MCP del índice entre pulgar (4-5) y punta índice (8-5)
+    ang = _angle_deg(d[4][0]*d[12][0] + d[4][1]*d[12][1], n4, n12)
+
+    # O: distancia de cada punta a su centro (entero)
+    cx = _trunc((x4 + x8 + x12 + x16 + x20) / 5)
+    cy = _trunc((y4 + y8 + y12 + y16 + y20) / 5)
+    dc0 = ((x4-cx)**2 + (y4-cy)**2) ** 0.5 / s
+    dc1 = ((x8-cx)**2 + (y8-cy)**2) ** 0.5 / s
+    dc2 = ((x12-cx)**2 + (y12-cy)**2) ** 0.5 / s
+    dc3 = ((x16-cx)**2 + (y16-cy)**2) ** 0.5 / s
+    dc4 = ((x20-cx)**2 + (y20-cy)**2) ** 0.5 / s
+    r = (dc0 + dc1 + dc2 + dc3 + dc4) / 5.0
+    spread = (abs(dc0-r) + abs(dc1-r) + abs(dc2-r) + abs(dc3-r) + abs(dc4-r)) / 5.0
+
+    return HandFeatures(
+        n[0] / s, n[1] / s, n[2] / s, dist3, dist4, n[5] / s, n[6] / s,
+        n[7] / s, n[8] / s, n[9] / s, n[10] / s, n[11] / s, n12 / s,
+        abs(y6 - y4) / s, abs(y8 - y4) / s, abs(y12 - y8) / s, abs(x12 - x8) / s,
+        abs(dy11) / (abs(dx11) + 1e-6), abs(dy13) / (abs(dx13) + 1e-6),
+        abs(dy14) / (abs(dx14) + 1e-6), abs(dy15) / (abs(dx15) + 1e-6),
+        ang, r, spread,
+        # extendido = punta más arriba que el PIP
+        dy11 > 0, dy13 > 0, dy14 > 0, dy15 > 0,
+        (dist3 > 0.70) & (dist4 > 0.25),
+        y8 - y4 < 0, y12 - y4 < 0, y16 - y4 < 0, y20 - y4 < 0,
+        y16 - y4 > 0,
+        y4 > y6,
+        (y8 + 0.02*scale_h) < wrist_y_for_down,
+        y8 > y0 + 0.03*scale_h,
+        (y8 + 0.02*scale_h) < y12,
+        y4 < y8 + 0.08*scale_h,
+        ((x4 - x8) * (x4 - x12) <= 0) & ((y4 - y8) * (y4 - y12) <= 0),  # between() en x e y
+        y8 > y6 - 0.01*scale_h,
+    )
+
 # -------------------- ROI Z helpers --------------------
 def point_in_roi(point, roi):
     x, y = point
@@ -160,19 +300,97 @@ def draw_bbox(image, box, color=(0,255,0)):
 def put_big_text(img, txt, org=(40,120)):
     cv2.putText(img, txt, org, cv2.FONT_HERSHEY_SIMPLEX, 3.0, (0,0,255), 6, cv2.LINE_AA)
 
+# -------------------- Buffers de frames --------------------
+class FramePool:
+    """
+    Buffers de imagen reutilizables para no asignar un frame nuevo por iteración.
+    acquire() entrega uno libre del tamaño pedido (o lo crea); release() lo devuelve.
+    Se puede usar desde varios hilos (deque.append/pop son atómicos).
+    """
+    def __init__(self, max_free=4):
+        self._free = collections.deque(maxlen=max_free)
+        self.allocated = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        while True:
+            try:
+                buf = self._free.pop()
+            except IndexError:
+                break
+            if buf.shape == shape and buf.dtype == dtype:
+                return buf
+        self.allocated += 1
+        return np.empty(shape, dtype)
+
+    def release(self, buf):
+        if isinstance(buf, np.ndarray):
+            self._free.append(buf)
+
 # -------------------- Stabilizer --------------------
 class Debouncer:
-    def __init__(self, window=7):
-        self.recent = collections.deque(maxlen=window)
-
-    def push(self, new_label: str) -> str:
-        self.recent.append(new_label)
-        if not self.recent:
-            return ""
-        candidates = [x for x in self.recent if x]
-        if not candidates:
-            return ""
-        return max(set(candidates), key=candidates.count)
+    """Voto por mayoría sobre las últimas `window` etiquetas, incremental.
+       Lleva el peso acumulado de cada etiqueta (se suma al entrar a la ventana y se resta
+       al salir) y la etiqueta ganadora; solo se recorren los pesos (a lo sumo uno por letra)
+       cuando sale de la ventana un voto de la ganadora. En un empate gana la actual.
+       decay < 1: cada voto nuevo pesa 1/decay veces más que el anterior (los viejos se desvanecen).
+    """
+    def __init__(self, window=7, decay=1.0):
+        self.window = window
+        self.decay = decay
+        self.recent = collections.deque()   # (label, peso escalado)
+        self._weights = {}                  # label -> peso acumulado en la ventana
+        self._counts = {}                   # label -> votos en la ventana
+        self._scale = 1.0                   # decaimiento acumulado (se renormaliza de vez en cuando)
+        self._mode = ""
+
+    def push(self, new_label: str, weight: float = 1.0) -> str:
+        if len(self.recent) >= self.window:
+            self._evict(*self.recent.popleft())
+        if self.decay != 1.0:
+            self._scale /= self.decay
+            if self._scale > 1e100:
+                self._renormalize()
+        w = weight * self._scale
+        self.recent.append((new_label, w))
+        if new_label:
+            total = self._weights.get(new_label, 0.0) + w
+            self._weights[new_label] = total
+            self._counts[new_label] = self._counts.get(new_label, 0) + 1
+            mode = self._mode
+            if new_label != mode and (not mode or total > self._weights[mode]):
+                self._mode = new_label
+        return self._mode
+
+    def _evict(self, label, w):
+        if not label:
+            return
+        n = self._counts[label] - 1
+        if n:
+            self._counts[label] = n
+            self._weights[label] -= w
+        else:
+            del self._counts[label], self._weights[label]
+        if label == self._mode:
+            weights = self._weights
+            if not weights:
+                self._mode = ""
+                return
+            best = max(weights, key=weights.get)
+            if weights.get(label, -1.0) < weights[best]:
+                self._mode = best
+
+    def _renormalize(self):
+        s = self._scale
+        self.recent = collections.deque((label, w / s) for label, w in self.recent)
+        self._weights = {label: w / s for label, w in self._weights.items()}
+        self._scale = 1.0
+
+    def reset(self):
+        self.recent.clear()
+        self._weights.clear()
+        self._counts.clear()
+        self._scale = 1.0
+        self._mode = ""
 
 # -------------------- Clasificador estático --------------------
 def classify_letter(lm, W, H, scale_h, wrist_y_for_down):
@@ -180,210 +398,178 @@ def classify_letter(lm, W, H, scale_h, wrist_y_for_down):
     Devuelve una letra (ASL) o "" si no hay match.
     Nota: La detección dinámica de 'J' y el trazo de 'Z' se manejan fuera de esta función.
     """
-    wrist   = lm_px(lm, 0,  W, H)
-    thumb2  = lm_px(lm, 2,  W, H)
-    thumb4  = lm_px(lm, 4,  W, H)
-    idx5    = lm_px(lm, 5,  W, H)
-    idx6    = lm_px(lm, 6,  W, H)
-    idx8    = lm_px(lm, 8,  W, H)
-    mid10   = lm_px(lm, 10, W, H)
-    mid12   = lm_px(lm, 12, W, H)
-    rng14   = lm_px(lm, 14, W, H)
-    rng16   = lm_px(lm, 16, W, H)
-    pky18   = lm_px(lm, 18, W, H)
-    pky20   = lm_px(lm, 20, W, H)
-
-    def ndist(a,b):
-        return euclid(a,b) / max(1.0, scale_h)
-
-    # Estado extendido
-    idx_ext = is_extended_y(idx8, idx6)
-    mid_ext = is_extended_y(mid12, mid10)
-    rng_ext = is_extended_y(rng16, rng14)
-    pky_ext = is_extended_y(pky20, pky18)
-
-    idx_mid_gap = ndist(idx8, mid12)
-    mid_rng_gap = ndist(mid12, rng16)
-
-    # “Pulgar extendido real” (para diferenciar I/Y)
-    thumb_dist_wrist = ndist(thumb4, wrist)
-    thumb_dist_idx   = ndist(thumb4, idx5)
-    thb_ext = (thumb_dist_wrist > 0.70) and (thumb_dist_idx > 0.25)
-
-    # A
-    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext
-        and abs(thumb4[1] - idx6[1]) / max(1.0, scale_h) < 0.08):
-        return "A"
-
-    # B (ajustada)
-    if idx_ext and mid_ext and rng_ext and pky_ext:
-        thumb_near_palm = ndist(thumb4, idx6) < TH_NEAR
-        fingers_flat = (horiz_ratio(idx8, idx6) < 0.8 and
-                        horiz_ratio(mid12, mid10) < 0.8 and
-                        horiz_ratio(rng16, rng14) < 0.8 and
-                        horiz_ratio(pky20, pky18) < 0.8)
-        compact_band = (idx_mid_gap + mid_rng_gap) < 0.24
-        if thumb_near_palm and fingers_flat and compact_band:
-            return "B"
-
-    # C
-    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext):
-        if TH_CLOSE <= ndist(thumb4, idx8) <= 0.25 and \
-           TH_NEAR  <= ndist(thumb4, pky20) <= 0.40 and \
-           ndist(idx8, mid12) < 0.20 and ndist(mid12, rng16) < 0.20 and ndist(rng16, pky20) < 0.20:
-            return "C"
-
-    # D
-    if idx_ext and (not mid_ext) and (not rng_ext) and (not pky_ext) and \
-       (ndist(thumb4, mid12) < 0.11 or ndist(thumb4, rng16) < 0.11):
-        return "D"
-
-    # E
-    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext) and \
-       (thumb4[1] > idx8[1] and thumb4[1] > mid12[1] and thumb4[1] > rng16[1] and thumb4[1] > pky20[1]):
-        return "E"
-
-    # F
-    if ndist(idx8, thumb4) < 0.10 and mid_ext and rng_ext and pky_ext and (not idx_ext):
-        return "F"
-
+    # una sola mano: a píxeles en Python puro y solo los landmarks que usan las reglas
+    # (int() trunca igual que astype); con 21 puntos armar arrays cuesta más que la cuenta
+    lms = lm.landmark
+    xs = [0] * 21
+    ys = [0] * 21
+    for i in _USED_LANDMARKS:
+        p = lms[i]
+        xs[i] = int(p.x * W)
+        ys[i] = int(p.y * H)
+    return classify_features(_hand_features_py(xs, ys, scale_h, wrist_y_for_down))
+
+# Reglas estáticas en orden de prioridad: (letra, dedos, condición extra).
+# "dedos" es el estado de índice, medio, anular, meñique y pulgar:
+# "1" extendido, "0" flexionado, "-" no importa.
+# Las condiciones usan solo comparaciones, & y | para valer tanto con
+# escalares (una mano) como con arrays (classify_batch).
+LETTER_RULES = (
+    ("A", "0000-", lambda f: f.thumb_idx6_dy < 0.08),
+    ("B", "1111-", lambda f: (f.thumb_idx6 < TH_NEAR)                     # pulgar junto a la palma
+                             & (f.idx_hr < 0.8) & (f.mid_hr < 0.8)        # dedos planos
+                             & (f.rng_hr < 0.8) & (f.pky_hr < 0.8)
+                             & ((f.idx_mid_gap + f.mid_rng_gap) < 0.24)),  # banda compacta
+    ("C", "0000-", lambda f: (TH_CLOSE <= f.thumb_idx8) & (f.thumb_idx8 <= 0.25)
+                             & (TH_NEAR <= f.thumb_pky20) & (f.thumb_pky20 <= 0.40)
+                             & (f.idx_mid_gap < 0.20) & (f.mid_rng_gap < 0.20) & (f.rng_pky_gap < 0.20)),
+    ("D", "1000-", lambda f: (f.thumb_mid12 < 0.11) | (f.thumb_rng16 < 0.11)),
+    ("E", "0000-", lambda f: f.idx_above_thumb & f.mid_above_thumb & f.rng_above_thumb & f.pky_above_thumb),
+    ("F", "0111-", lambda f: f.thumb_idx8 < 0.10),
     # G — índice horizontal extendido; pulgar alineado; resto flexionados (y arriba de la muñeca)
-    if idx_ext and (not mid_ext) and (not rng_ext) and (not pky_ext):
-        index_horizontal = roughly_horizontal(idx8, idx6, 0.55)
-        same_y_thumb = abs(idx8[1] - thumb4[1]) / max(1.0, scale_h) < 0.06
-        close_thumb_idx = ndist(thumb4, idx8) < TH_MED
-        above_wrist = (idx8[1] + 0.02*scale_h) < wrist_y_for_down
-        if index_horizontal and same_y_thumb and close_thumb_idx and above_wrist:
-            return "G"
-
+    ("G", "1000-", lambda f: (f.idx_hr < 0.55) & (f.idx_thumb_dy < 0.06)
+                             & (f.thumb_idx8 < TH_MED) & f.idx_above_wrist),
     # H — índice y medio horizontales, a la misma altura aprox; resto flexionados
-    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext):
-        same_level = abs(idx8[1]-mid12[1]) / max(1.0, scale_h) < 0.06
-        both_h = roughly_horizontal(idx8, idx6, 0.60) and roughly_horizontal(mid12, mid10, 0.60)
-        sep_min = abs(idx8[0]-mid12[0]) / max(1.0, scale_h) >= 0.09
-        sep_max = abs(idx8[0]-mid12[0]) / max(1.0, scale_h) <= 0.22
-        if same_level and both_h and sep_min and sep_max:
-            return "H"
-
+    ("H", "1100-", lambda f: (f.idx_mid_dy < 0.06) & (f.idx_hr < 0.60) & (f.mid_hr < 0.60)
+                             & (f.idx_mid_dx >= 0.09) & (f.idx_mid_dx <= 0.22)),
     # Y (shaka): pulgar y meñique extendidos; índice/medio/anular flexionados
-    if (not idx_ext) and (not mid_ext) and (not rng_ext) and pky_ext and thb_ext:
-        return "Y"
-
+    ("Y", "00011", None),
     # I: meñique extendido; resto flexionados; pulgar NO extendido
-    if pky_ext and (not idx_ext) and (not mid_ext) and (not rng_ext):
-        if not thb_ext:
-            return "I"
-
-    # K
-    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext) and idx_mid_gap >= 0.12 and thb_ext \
-       and (euclid(thumb4, mid10)/max(1.0, scale_h) < 0.13 or euclid(thumb4, idx5)/max(1.0, scale_h) < 0.13):
-        return "K"
-
-    # L
-    ang_L = angle(thumb4, idx5, idx8)
-    if idx_ext and thb_ext and (not mid_ext) and (not rng_ext) and (not pky_ext) and 70 <= ang_L <= 110:
-        return "L"
-
-    # M
-    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext) \
-       and (idx8[1] < thumb4[1] and mid12[1] < thumb4[1] and rng16[1] < thumb4[1]):
-        return "M"
-
-    # N
-    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext) \
-       and (idx8[1] < thumb4[1] and mid12[1] < thumb4[1] and rng16[1] > thumb4[1]):
-        return "N"
-
+    ("I", "00010", None),
+    ("K", "11001", lambda f: (f.idx_mid_gap >= 0.12) & ((f.thumb_mid10 < 0.13) | (f.thumb_idx5 < 0.13))),
+    ("L", "10001", lambda f: (70 <= f.angle_L) & (f.angle_L <= 110)),
+    ("M", "0000-", lambda f: f.idx_above_thumb & f.mid_above_thumb & f.rng_above_thumb),
+    ("N", "0000-", lambda f: f.idx_above_thumb & f.mid_above_thumb & f.rng_below_thumb),
     # O (más selectiva)
-    tips = [thumb4, idx8, mid12, rng16, pky20]
-    cx = int(sum(t[0] for t in tips)/5); cy = int(sum(t[1] for t in tips)/5)
-    def ndc(t): return euclid((cx,cy), t)/max(1.0, scale_h)
-    r  = sum(ndc(t) for t in tips) / 5.0
-    var = sum(abs(ndc(t) - r) for t in tips) / 5.0
-    thumb_idx_dist = euclid(thumb4, idx8)/max(1.0, scale_h)
-    if 0.11 < r < 0.22 and var < 0.085 and thumb4[1] > idx6[1] and 0.10 < thumb_idx_dist < 0.22:
-        return "O"
-
+    ("O", "-----", lambda f: (0.11 < f.o_radius) & (f.o_radius < 0.22) & (f.o_spread < 0.085)
+                             & f.thumb_below_idx6 & (0.10 < f.thumb_idx8) & (f.thumb_idx8 < 0.22)),
     # P (vertical hacia abajo)
-    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext):
-        split = (abs(idx8[0]-mid12[0]) / max(1.0, scale_h)) >= TH_GAP_SPLIT
-        thumb_between = thb_ext and (euclid(thumb4, mid10)/max(1.0, scale_h) < TH_NEAR or euclid(thumb4, idx5)/max(1.0, scale_h) < TH_NEAR)
-        pointing_down = (idx8[1] > wrist[1] + 0.03*scale_h) and roughly_vertical(idx8, idx6, 0.85)
-        if split and thumb_between and pointing_down:
-            return "P"
-
+    ("P", "11001", lambda f: (f.idx_mid_dx >= TH_GAP_SPLIT)
+                             & ((f.thumb_mid10 < TH_NEAR) | (f.thumb_idx5 < TH_NEAR))
+                             & f.idx_below_wrist & (f.idx_hr > 0.85)),
     # Q (G hacia abajo, no horizontal)
-    if idx_ext and (not mid_ext) and (not rng_ext) and (not pky_ext):
-        same_y_thumb = abs(idx8[1]-thumb4[1]) / max(1.0, scale_h) < 0.06
-        close_thumb_idx = euclid(thumb4, idx8)/max(1.0, scale_h) < TH_MED
-        below_wrist = (idx8[1] > wrist[1] + 0.03*scale_h)
-        not_horizontal = not roughly_horizontal(idx8, idx6, 0.55)
-        if same_y_thumb and close_thumb_idx and below_wrist and not_horizontal:
-            return "Q"
-
-    # R
-    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext):
-        gap = abs(idx8[0]-mid12[0]) / max(1.0, scale_h)
-        higher_idx = (idx8[1] + 0.02*scale_h) < mid12[1]
-        if gap < TH_GAP_TIGHT and higher_idx:
-            return "R"
-
+    ("Q", "1000-", lambda f: (f.idx_thumb_dy < 0.06) & (f.thumb_idx8 < TH_MED)
+                             & f.idx_below_wrist & (f.idx_hr >= 0.55)),
+    ("R", "1100-", lambda f: (f.idx_mid_dx < TH_GAP_TIGHT) & f.idx_higher_mid),
     # S (pulgar por fuera)
-    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext):
-        thumb_over_knuckle = euclid(thumb4, idx6)/max(1.0, scale_h) < TH_NEAR and thumb4[1] < idx8[1] + 0.08*scale_h
-        thumb_not_between  = euclid(thumb4, idx8)/max(1.0, scale_h) >= TH_CLOSE + 0.02
-        if thumb_over_knuckle and thumb_not_between:
-            return "S"
-
+    ("S", "0000-", lambda f: (f.thumb_idx6 < TH_NEAR) & f.thumb_over_idx & (f.thumb_idx8 >= TH_CLOSE + 0.02)),
     # T (pulgar entre índice y medio)
-    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext):
-        between_xy = between(thumb4[0], idx8[0], mid12[0]) and between(thumb4[1], idx8[1], mid12[1])
-        very_close = (euclid(thumb4, idx8)/max(1.0, scale_h) < TH_CLOSE + 0.01) and (euclid(thumb4, mid12)/max(1.0, scale_h) < TH_NEAR)
-        if between_xy and very_close:
-            return "T"
-
-    # U
-    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext) and idx_mid_gap < 0.08 \
-       and euclid(thumb4, rng16)/max(1.0, scale_h) < 0.12:
-        return "U"
-
-    # V
-    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext) and idx_mid_gap >= 0.12:
-        return "V"
-
-    # W
-    if idx_ext and mid_ext and rng_ext and (not pky_ext) and (idx_mid_gap + mid_rng_gap) >= 0.22:
-        return "W"
-
+    ("T", "0000-", lambda f: f.thumb_between_xy & (f.thumb_idx8 < TH_CLOSE + 0.01) & (f.thumb_mid12 < TH_NEAR)),
+    ("U", "1100-", lambda f: (f.idx_mid_gap < 0.08) & (f.thumb_rng16 < 0.12)),
+    ("V", "1100-", lambda f: f.idx_mid_gap >= 0.12),
+    ("W", "1110-", lambda f: (f.idx_mid_gap + f.mid_rng_gap) >= 0.22),
     # X (índice en gancho; pulgar fuera; índice NO extendido)
-    if (not mid_ext) and (not rng_ext) and (not pky_ext) and thb_ext:
-        hook = euclid(idx8, idx6)/max(1.0, scale_h) < 0.11 and euclid(idx8, idx5)/max(1.0, scale_h) < 0.18
-        curled = hook and (idx8[1] > idx6[1] - 0.01*scale_h)
-        if curled and (not is_extended_y(idx8, idx6)):
-            return "X"
-
+    ("X", "00001", lambda f: (f.idx8_idx6 < 0.11) & (f.idx8_idx5 < 0.18) & f.idx_curled),
+)
+
+def _pattern_bits(pattern):
+    # "10-01" -> (bits que importan, valor esperado) sobre finger_key()
+    care = value = 0
+    for i, c in enumerate(pattern):
+        if c != "-":
+            care |= 1 << i
+            if c == "1":
+                value |= 1 << i
+    return care, value
+
+_RULES = [(letter,) + _pattern_bits(pattern) + (cond,) for letter, pattern, cond in LETTER_RULES]
+
+def finger_key(f):
+    """Máscara de 5 bits: índice, medio, anular, meñique y pulgar extendidos."""
+    return f.idx_ext * 1 + f.mid_ext * 2 + f.rng_ext * 4 + f.pky_ext * 8 + f.thb_ext * 16
+
+def build_rule_table(rules):
+    """
+    Compila la cascada en una tabla indexada por finger_key(): para cada una de
+    las 32 combinaciones de dedos quedan solo las letras posibles, en el mismo orden.
+    """
+    table = []
+    for key in range(32):
+        table.append(tuple((letter, cond) for letter, care, value, cond in rules if (key & care) == value))
+    return table
+
+_RULE_TABLE = build_rule_table(_RULES)
+
+def classify_features(f):
+    """Igual que classify_letter pero sobre HandFeatures ya calculados."""
+    for letter, cond in _RULE_TABLE[finger_key(f)]:
+        if cond is None or cond(f):
+            return letter
     return ""
 
+def classify_batch(landmarks, W, H):
+    """
+    Clasifica N manos de una vez con las mismas reglas que classify_letter.
+    landmarks: array (N, 21, 3) normalizado como lo entrega MediaPipe.
+    Devuelve un array (N,) de letras ("" si no hay match).
+    """
+    lm = np.asarray(landmarks, dtype=np.float64)
+    pts = (lm[..., :2] * (W, H)).astype(np.int64)
+    ys = pts[..., 1]
+    scale_h = np.maximum(1, ys.max(-1) - ys.min(-1))
+    f = hand_features(pts, scale_h, ys[..., 0])
+    key = finger_key(f)
+
+    labels = np.full(len(pts), "", dtype="<U1")
+    pending = np.ones(len(pts), dtype=bool)
+    for letter, care, value, cond in _RULES:
+        hit = pending & ((key & care) == value)
+        if cond is not None and hit.any():
+            hit &= cond(f)
+        labels[hit] = letter
+        pending &= ~hit
+    return labels
+
+def inference_size(shape, infer_width):
+    """(ancho, alto) de la copia para la inferencia, o None si se usa la imagen tal cual."""
+    H, W = shape[:2]
+    if not infer_width or infer_width >= W:
+        return None
+    return (int(infer_width), max(1, round(H * infer_width / W)))
+
+def inference_view(image, infer_width, dst=None):
+    """Copia reducida (mismo aspecto) para la inferencia; la imagen tal cual si no hace falta."""
+    size = inference_size(image.shape, infer_width)
+    if size is None:
+        return image
+    # MediaPipe vuelve a escalar internamente al tamaño del modelo: lineal alcanza
+    return cv2.resize(image, size, dst=dst, interpolation=cv2.INTER_LINEAR)
+
 # -------------------- Motor en clase --------------------
+# Tipos de frame que ve la lógica sin ML (ver LetterEngine.feed y replay.py)
+FRAME_IDLE = 0   # recognize=False: menús / cooldown
+FRAME_SKIP = 1   # frame salteado: se repite la última etiqueta
+FRAME_NONE = 2   # inferencia sin mano a la vista
+FRAME_HAND = 3   # inferencia con mano (landmarks en px)
+
 class LetterEngine:
     """Encapsula cámara, MediaPipe Hands y la lógica de clasificación.
        Método principal: process_frame(frame_bgr) -> (label, annotated_frame)
+       infer_every: corre MediaPipe 1 de cada N frames con mano a la vista;
+       idle_every: idem mientras no se ve ninguna mano. En los frames salteados
+       se reusan los últimos landmarks y la última etiqueta.
+       infer_width: ancho (px) de la copia reducida que ve MediaPipe; None = resolución completa.
+       use_mediapipe=False: sin modelo, solo la lógica de feed() (replay / tests).
     """
-    def __init__(self, cam_w=1280, cam_h=720, window=7):
+    def __init__(self, cam_w=1280, cam_h=720, window=7, infer_every=1, idle_every=1, infer_width=None,
+                 use_mediapipe=True):
         # MediaPipe
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_styles = mp.solutions.drawing_styles
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            model_complexity=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7,
-            max_num_hands=1
-        )
+        self.hands = None
+        if use_mediapipe:
+            self.mp_drawing = mp.solutions.drawing_utils
+            self.mp_styles = mp.solutions.drawing_styles
+            self.mp_hands = mp.solutions.hands
+            self.hands = self.mp_hands.Hands(
+                model_complexity=1,
+                min_detection_confidence=0.7,
+                min_tracking_confidence=0.7,
+                max_num_hands=1
+            )
 
         # Estado
         self.deb = Debouncer(window=window)
         self.last_pinky = collections.deque(maxlen=5)
+        self.recorder = None      # LandmarkRecorder opcional (replay.py)
 
         # ROI Z
         self.z_roi_points = []
@@ -395,6 +581,20 @@ class LetterEngine:
         self.cam_w = cam_w
         self.cam_h = cam_h
 
+        # Tasa de inferencia adaptativa
+        self.infer_every = max(1, int(infer_every))
+        self.idle_every = max(1, int(idle_every))
+        self._skip_left = 0       # frames que faltan saltear hasta la próxima inferencia
+        self._last_hands = None   # multi_hand_landmarks de la última inferencia
+        self._last_label = ""
+        self.inferences = 0       # contador de llamadas reales a MediaPipe
+        self.infer_width = infer_width
+
+        # Buffers reutilizables: frames anotados (los devuelve el llamador con
+        # release_frame) y copias internas para la inferencia
+        self.frame_pool = FramePool()
+        self._scratch = {}
+
     def _ensure_roi(self, W, H):
         if self.z_roi_bounds is None:
             roi_width = int(W * 0.25)  # 25% del ancho
@@ -403,107 +603,166 @@ class LetterEngine:
             self.z_roi_bounds = (W - roi_width - margin, margin,
                                  W - margin, roi_height + margin)
 
-    def process_frame(self, frame_bgr):
-        """Procesa 1 frame BGR y retorna (label_estable, frame_anotado)."""
-        image = cv2.flip(frame_bgr, 1)  # espejo
-        H, W, _ = image.shape
-        self._ensure_roi(W, H)
+    def release_frame(self, image):
+        """Devuelve al pool un frame anotado que ya se mostró."""
+        self.frame_pool.release(image)
+
+    def _scratch_buf(self, name, shape):
+        buf = self._scratch.get(name)
+        if buf is None or buf.shape != shape:
+            buf = self._scratch[name] = np.empty(shape, np.uint8)
+        return buf
+
+    def _draw_hands(self, image, hands):
+        for hand_lms in hands:
+            self.mp_drawing.draw_landmarks(
+                image, hand_lms, self.mp_hands.HAND_CONNECTIONS,
+                self.mp_styles.get_default_hand_landmarks_style(),
+                self.mp_styles.get_default_hand_connections_style()
+            )
+
+    def _recognize_hand(self, pts, scale_h, now):
+        """Z-ROI, clasificación estática, J y debounce para una mano (pts en px)."""
+        label = ""
+        p = pts.tolist()
+        feats = hand_features(pts, scale_h, p[0][1])
+        idx8  = tuple(p[8])
+        pky20 = tuple(p[20])
+
+        # estado dedos
+        idx_ext, mid_ext, rng_ext, pky_ext = feats.idx_ext, feats.mid_ext, feats.rng_ext, feats.pky_ext
+
+        # ======== ROI Z: tracking del trazo con el índice =========
+        z_gesture = idx_ext and (not mid_ext) and (not rng_ext) and (not pky_ext)
+        if z_gesture and point_in_roi(idx8, self.z_roi_bounds):
+            if not self.z_roi_active:
+                self.z_roi_active = True
+                self.z_roi_points.clear()
+                self.z_detection_status = None
+            if not self.z_roi_points or euclid(idx8, self.z_roi_points[-1]) > 5:
+                self.z_roi_points.append(idx8)
+        elif self.z_roi_active and not point_in_roi(idx8, self.z_roi_bounds):
+            # terminó el trazo: evaluar
+            self.z_roi_active = False
+            x1r, y1r, x2r, y2r = self.z_roi_bounds
+            roi_w = x2r - x1r
+            roi_h = y2r - y1r
+            if analyze_z_pattern(self.z_roi_points, roi_w, roi_h, self.z_roi_bounds):
+                label = "Z"
+                self.z_detection_status = "success"
+                self.z_last_detection_time = now
+            else:
+                self.z_detection_status = "fail"
+                self.z_last_detection_time = now
+
+        # ======== Clasificación estática (A–Y excepto J) =========
+        raw = classify_features(feats)
+
+        # ======== J dinámica (meñique extendido con caída y cambio de dirección) ========
+        if raw == "":
+            if pky_ext and (not idx_ext) and (not mid_ext) and (not rng_ext):
+                self.last_pinky.append(pky20)
+                if len(self.last_pinky) >= 5:
+                    dy = self.last_pinky[-1][1] - self.last_pinky[0][1]  # + abajo
+                    dx_start = self.last_pinky[len(self.last_pinky)//2][0] - self.last_pinky[0][0]
+                    dx_end   = self.last_pinky[-1][0] - self.last_pinky[len(self.last_pinky)//2][0]
+                    change_dir = (dx_start == 0) or (dx_start * dx_end < 0)  # reversa en X
+                    if dy / max(1.0, scale_h) > 0.12 and change_dir:
+                        raw = "J"
+        else:
+            # si hubo letra “fija”, reseteo trayectoria J
+            self.last_pinky.clear()
 
-        current_time = time.time()
-        if self.z_detection_status and (current_time - self.z_last_detection_time) > 2.0:
+        # ======== Debounce / etiqueta estable (salvo si ya marcó Z) ========
+        if not label:
+            label = self.deb.push(raw)
+        return label
+
+    def feed(self, now, kind, pts=None):
+        """Lógica sin ML de un frame: timeout de Z, Z-ROI, J, clasificación y debounce.
+           kind: FRAME_IDLE / FRAME_SKIP / FRAME_NONE / FRAME_HAND (pts (21, 2) en px).
+           La usan process_frame (con MediaPipe) y replay.py (con landmarks grabados).
+        """
+        self._ensure_roi(self.cam_w, self.cam_h)
+        if self.z_detection_status and (now - self.z_last_detection_time) > 2.0:
             self.z_detection_status = None
             self.z_roi_points.clear()
             self.z_roi_active = False
 
-        # MediaPipe
-        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        rgb.flags.writeable = False
-        results = self.hands.process(rgb)
-        rgb.flags.writeable = True
-
-        label = ""
-
-        if results.multi_hand_landmarks:
-            for hand_lms in results.multi_hand_landmarks:
-                # bbox + escala
-                x1,y1,x2,y2 = bbox_from_landmarks(image.shape, hand_lms)
-                scale_h = max(1, y2 - y1)
-
-                # dibujo landmarks (comentá si querés más FPS)
-                self.mp_drawing.draw_landmarks(
-                    image, hand_lms, self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_styles.get_default_hand_landmarks_style(),
-                    self.mp_styles.get_default_hand_connections_style()
-                )
-
-                # puntos útiles
-                idx8  = lm_px(hand_lms, 8,  W, H)
-                idx6  = lm_px(hand_lms, 6,  W, H)
-                mid12 = lm_px(hand_lms, 12, W, H)
-                rng16 = lm_px(hand_lms, 16, W, H)
-                pky20 = lm_px(hand_lms, 20, W, H)
-                mid10 = lm_px(hand_lms, 10, W, H)
-                rng14 = lm_px(hand_lms, 14, W, H)
-                pky18 = lm_px(hand_lms, 18, W, H)
-
-                # estado dedos
-                idx_ext = is_extended_y(idx8, idx6)
-                mid_ext = is_extended_y(mid12, mid10)
-                rng_ext = is_extended_y(rng16, rng14)
-                pky_ext = is_extended_y(pky20, pky18)
-
-                # ======== ROI Z: tracking del trazo con el índice =========
-                z_gesture = idx_ext and (not mid_ext) and (not rng_ext) and (not pky_ext)
-                if z_gesture and point_in_roi(idx8, self.z_roi_bounds):
-                    if not self.z_roi_active:
-                        self.z_roi_active = True
-                        self.z_roi_points.clear()
-                        self.z_detection_status = None
-                    if not self.z_roi_points or euclid(idx8, self.z_roi_points[-1]) > 5:
-                        self.z_roi_points.append(idx8)
-                elif self.z_roi_active and not point_in_roi(idx8, self.z_roi_bounds):
-                    # terminó el trazo: evaluar
-                    self.z_roi_active = False
-                    x1r, y1r, x2r, y2r = self.z_roi_bounds
-                    roi_w = x2r - x1r
-                    roi_h = y2r - y1r
-                    if analyze_z_pattern(self.z_roi_points, roi_w, roi_h, self.z_roi_bounds):
-                        label = "Z"
-                        self.z_detection_status = "success"
-                        self.z_last_detection_time = current_time
-                    else:
-                        self.z_detection_status = "fail"
-                        self.z_last_detection_time = current_time
-
-                # ======== Clasificación estática (A–Y excepto J) =========
-                wrist = lm_px(hand_lms, 0, W, H)
-                raw = classify_letter(hand_lms, W, H, scale_h, wrist[1])
-
-                # ======== J dinámica (meñique extendido con caída y cambio de dirección) ========
-                if raw == "":
-                    if pky_ext and (not idx_ext) and (not mid_ext) and (not rng_ext):
-                        self.last_pinky.append(pky20)
-                        if len(self.last_pinky) >= 5:
-                            dy = self.last_pinky[-1][1] - self.last_pinky[0][1]  # + abajo
-                            dx_start = self.last_pinky[len(self.last_pinky)//2][0] - self.last_pinky[0][0]
-                            dx_end   = self.last_pinky[-1][0] - self.last_pinky[len(self.last_pinky)//2][0]
-                            change_dir = (dx_start == 0) or (dx_start * dx_end < 0)  # reversa en X
-                            if dy / max(1.0, scale_h) > 0.12 and change_dir:
-                                raw = "J"
-                else:
-                    # si hubo letra “fija”, reseteo trayectoria J
-                    self.last_pinky.clear()
-
-                # ======== Debounce / etiqueta estable (salvo si ya marcó Z) ========
-                if not label:
-                    label = self.deb.push(raw)
+        scale_h = 0
+        if kind == FRAME_IDLE:
+            # sin inferencia (menús, cooldown de PLAY): se conservan el debounce y los trazos
+            # de Z / J en curso, como si la mano no se hubiera movido
+            label = ""
+        elif kind == FRAME_SKIP:
+            label = self._last_label
+        elif kind == FRAME_HAND:
+            scale_h = max(1, int(pts[:, 1].max()) - int(pts[:, 1].min()))
+            label = self._recognize_hand(pts, scale_h, now)
         else:
             # no mano
             self.last_pinky.clear()
             if self.z_roi_active:
                 self.z_roi_active = False
+            label = ""
+
+        if self.recorder is not None:
+            self.recorder.write(now, kind, pts, scale_h)
+        self._last_label = label
+        return label
+
+    def process_frame(self, frame_bgr, recognize=True, now=None):
+        """Procesa 1 frame BGR y retorna (label_estable, frame_anotado).
+           recognize=False: sin MediaPipe ni clasificación (menús, cooldown); el ROI de Z y su
+           estado se siguen dibujando.
+           now: timestamp del frame (default time.time()).
+        """
+        image = cv2.flip(frame_bgr, 1, dst=self.frame_pool.acquire(frame_bgr.shape))  # espejo
+        H, W, _ = image.shape
+        self._ensure_roi(W, H)
+        if now is None:
+            now = time.time()
+
+        if not recognize:
+            self._last_hands = None
+            self._skip_left = 0
+            label = self.feed(now, FRAME_IDLE)
+            draw_z_roi(image, self.z_roi_bounds, self.z_roi_points, self.z_detection_status)
+            return label, image
+
+        # Frame salteado: se reusan landmarks y etiqueta de la última inferencia
+        if self._skip_left > 0:
+            self._skip_left -= 1
+            if self._last_hands:
+                self._draw_hands(image, self._last_hands)
+            label = self.feed(now, FRAME_SKIP)
+            draw_z_roi(image, self.z_roi_bounds, self.z_roi_points, self.z_detection_status)
+            return label, image
+        self.inferences += 1
+
+        # MediaPipe (landmarks normalizados: valen igual para la copia reducida y para el display)
+        size = inference_size(image.shape, self.infer_width)
+        small = image
+        if size is not None:
+            small = inference_view(image, self.infer_width, dst=self._scratch_buf("small", (size[1], size[0], 3)))
+        rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=self._scratch_buf("rgb", small.shape))
+        rgb.flags.writeable = False
+        results = self.hands.process(rgb)
+        rgb.flags.writeable = True
+
+        hands = results.multi_hand_landmarks
+        if hands:
+            # dibujo landmarks (comentá si querés más FPS)
+            self._draw_hands(image, hands)
+            # max_num_hands=1: una sola mano por frame, landmarks en px (una conversión)
+            label = self.feed(now, FRAME_HAND, landmarks_to_px(hands[0], W, H))
+        else:
+            label = self.feed(now, FRAME_NONE)
+
+        self._last_hands = hands
+        self._skip_left = (self.infer_every if self._last_hands else self.idle_every) - 1
 
         # Dibujo ROI de Z y trazo
         draw_z_roi(image, self.z_roi_bounds, self.z_roi_points, self.z_detection_status)
 
-        return label, image
\ No newline at end of file
+        return label, image
@@ -0,0 +1,301 @@
+# Tests del clasificador de letras (sin cámara: landmarks sintéticos)
+
+import collections
+import random
+
+import numpy as np
+
+from hand_corpus import W, H, landmark_corpus
+from tpi_letras import (
+    Debouncer, FramePool, LetterEngine, LETTER_RULES, _RULES, build_rule_table,
+    TH_CLOSE, TH_NEAR, TH_MED, TH_GAP_TIGHT, TH_GAP_SPLIT,
+    angle, between, classify_batch, classify_features, classify_letter, euclid, hand_features,
+    horiz_ratio, inference_view, is_extended_y, landmarks_to_px, lm_px, roughly_horizontal, roughly_vertical,
+)
+
+
+# -------------------- Implementación de referencia --------------------
+def classify_letter_reference(lm, W, H, scale_h, wrist_y_for_down):
+    """Cascada original (tuplas de Python) usada como oráculo de equivalencia."""
+    wrist   = lm_px(lm, 0,  W, H)
+    thumb4  = lm_px(lm, 4,  W, H)
+    idx5    = lm_px(lm, 5,  W, H)
+    idx6    = lm_px(lm, 6,  W, H)
+    idx8    = lm_px(lm, 8,  W, H)
+    mid10   = lm_px(lm, 10, W, H)
+    mid12   = lm_px(lm, 12, W, H)
+    rng14   = lm_px(lm, 14, W, H)
+    rng16   = lm_px(lm, 16, W, H)
+    pky18   = lm_px(lm, 18, W, H)
+    pky20   = lm_px(lm, 20, W, H)
+
+    def ndist(a, b):
+        return euclid(a, b) / max(1.0, scale_h)
+
+    idx_ext = is_extended_y(idx8, idx6)
+    mid_ext = is_extended_y(mid12, mid10)
+    rng_ext = is_extended_y(rng16, rng14)
+    pky_ext = is_extended_y(pky20, pky18)
+
+    idx_mid_gap = ndist(idx8, mid12)
+    mid_rng_gap = ndist(mid12, rng16)
+
+    thumb_dist_wrist = ndist(thumb4, wrist)
+    thumb_dist_idx   = ndist(thumb4, idx5)
+    thb_ext = (thumb_dist_wrist > 0.70) and (thumb_dist_idx > 0.25)
+
+    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext
+            and abs(thumb4[1] - idx6[1]) / max(1.0, scale_h) < 0.08):
+        return "A"
+    if idx_ext and mid_ext and rng_ext and pky_ext:
+        thumb_near_palm = ndist(thumb4, idx6) < TH_NEAR
+        fingers_flat = (horiz_ratio(idx8, idx6) < 0.8 and horiz_ratio(mid12, mid10) < 0.8 and
+                        horiz_ratio(rng16, rng14) < 0.8 and horiz_ratio(pky20, pky18) < 0.8)
+        compact_band = (idx_mid_gap + mid_rng_gap) < 0.24
+        if thumb_near_palm and fingers_flat and compact_band:
+            return "B"
+    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext):
+        if TH_CLOSE <= ndist(thumb4, idx8) <= 0.25 and \
+           TH_NEAR <= ndist(thumb4, pky20) <= 0.40 and \
+           ndist(idx8, mid12) < 0.20 and ndist(mid12, rng16) < 0.20 and ndist(rng16, pky20) < 0.20:
+            return "C"
+    if idx_ext and (not mid_ext) and (not rng_ext) and (not pky_ext) and \
+       (ndist(thumb4, mid12) < 0.11 or ndist(thumb4, rng16) < 0.11):
+        return "D"
+    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext) and \
+       (thumb4[1] > idx8[1] and thumb4[1] > mid12[1] and thumb4[1] > rng16[1] and thumb4[1] > pky20[1]):
+        return "E"
+    if ndist(idx8, thumb4) < 0.10 and mid_ext and rng_ext and pky_ext and (not idx_ext):
+        return "F"
+    if idx_ext and (not mid_ext) and (not rng_ext) and (not pky_ext):
+        index_horizontal = roughly_horizontal(idx8, idx6, 0.55)
+        same_y_thumb = abs(idx8[1] - thumb4[1]) / max(1.0, scale_h) < 0.06
+        close_thumb_idx = ndist(thumb4, idx8) < TH_MED
+        above_wrist = (idx8[1] + 0.02*scale_h) < wrist_y_for_down
+        if index_horizontal and same_y_thumb and close_thumb_idx and above_wrist:
+            return "G"
+    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext):
+        same_level = abs(idx8[1]-mid12[1]) / max(1.0, scale_h) < 0.06
+        both_h = roughly_horizontal(idx8, idx6, 0.60) and roughly_horizontal(mid12, mid10, 0.60)
+        sep_min = abs(idx8[0]-mid12[0]) / max(1.0, scale_h) >= 0.09
+        sep_max = abs(idx8[0]-mid12[0]) / max(1.0, scale_h) <= 0.22
+        if same_level and both_h and sep_min and sep_max:
+            return "H"
+    if (not idx_ext) and (not mid_ext) and (not rng_ext) and pky_ext and thb_ext:
+        return "Y"
+    if pky_ext and (not idx_ext) and (not mid_ext) and (not rng_ext):
+        if not thb_ext:
+            return "I"
+    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext) and idx_mid_gap >= 0.12 and thb_ext \
+       and (euclid(thumb4, mid10)/max(1.0, scale_h) < 0.13 or euclid(thumb4, idx5)/max(1.0, scale_h) < 0.13):
+        return "K"
+    ang_L = angle(thumb4, idx5, idx8)
+    if idx_ext and thb_ext and (not mid_ext) and (not rng_ext) and (not pky_ext) and 70 <= ang_L <= 110:
+        return "L"
+    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext) \
+       and (idx8[1] < thumb4[1] and mid12[1] < thumb4[1] and rng16[1] < thumb4[1]):
+        return "M"
+    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext) \
+       and (idx8[1] < thumb4[1] and mid12[1] < thumb4[1] and rng16[1] > thumb4[1]):
+        return "N"
+    tips = [thumb4, idx8, mid12, rng16, pky20]
+    cx = int(sum(t[0] for t in tips)/5); cy = int(sum(t[1] for t in tips)/5)
+
+    def ndc(t):
+        return euclid((cx, cy), t)/max(1.0, scale_h)
+    r = sum(ndc(t) for t in tips) / 5.0
+    var = sum(abs(ndc(t) - r) for t in tips) / 5.0
+    thumb_idx_dist = euclid(thumb4, idx8)/max(1.0, scale_h)
+    if 0.11 < r < 0.22 and var < 0.085 and thumb4[1] > idx6[1] and 0.10 < thumb_idx_dist < 0.22:
+        return "O"
+    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext):
+        split = (abs(idx8[0]-mid12[0]) / max(1.0, scale_h)) >= TH_GAP_SPLIT
+        thumb_between = thb_ext and (euclid(thumb4, mid10)/max(1.0, scale_h) < TH_NEAR or
+                                     euclid(thumb4, idx5)/max(1.0, scale_h) < TH_NEAR)
+        pointing_down = (idx8[1] > wrist[1] + 0.03*scale_h) and roughly_vertical(idx8, idx6, 0.85)
+        if split and thumb_between and pointing_down:
+            return "P"
+    if idx_ext and (not mid_ext) and (not rng_ext) and (not pky_ext):
+        same_y_thumb = abs(idx8[1]-thumb4[1]) / max(1.0, scale_h) < 0.06
+        close_thumb_idx = euclid(thumb4, idx8)/max(1.0, scale_h) < TH_MED
+        below_wrist = (idx8[1] > wrist[1] + 0.03*scale_h)
+        not_horizontal = not roughly_horizontal(idx8, idx6, 0.55)
+        if same_y_thumb and close_thumb_idx and below_wrist and not_horizontal:
+            return "Q"
+    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext):
+        gap = abs(idx8[0]-mid12[0]) / max(1.0, scale_h)
+        higher_idx = (idx8[1] + 0.02*scale_h) < mid12[1]
+        if gap < TH_GAP_TIGHT and higher_idx:
+            return "R"
+    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext):
+        thumb_over_knuckle = euclid(thumb4, idx6)/max(1.0, scale_h) < TH_NEAR and thumb4[1] < idx8[1] + 0.08*scale_h
+        thumb_not_between = euclid(thumb4, idx8)/max(1.0, scale_h) >= TH_CLOSE + 0.02
+        if thumb_over_knuckle and thumb_not_between:
+            return "S"
+    if (not idx_ext and not mid_ext and not rng_ext and not pky_ext):
+        between_xy = between(thumb4[0], idx8[0], mid12[0]) and between(thumb4[1], idx8[1], mid12[1])
+        very_close = (euclid(thumb4, idx8)/max(1.0, scale_h) < TH_CLOSE + 0.01) and \
+                     (euclid(thumb4, mid12)/max(1.0, scale_h) < TH_NEAR)
+        if between_xy and very_close:
+            return "T"
+    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext) and idx_mid_gap < 0.08 \
+       and euclid(thumb4, rng16)/max(1.0, scale_h) < 0.12:
+        return "U"
+    if idx_ext and mid_ext and (not rng_ext) and (not pky_ext) and idx_mid_gap >= 0.12:
+        return "V"
+    if idx_ext and mid_ext and rng_ext and (not pky_ext) and (idx_mid_gap + mid_rng_gap) >= 0.22:
+        return "W"
+    if (not mid_ext) and (not rng_ext) and (not pky_ext) and thb_ext:
+        hook = euclid(idx8, idx6)/max(1.0, scale_h) < 0.11 and euclid(idx8, idx5)/max(1.0, scale_h) < 0.18
+        curled = hook and (idx8[1] > idx6[1] - 0.01*scale_h)
+        if curled and (not is_extended_y(idx8, idx6)):
+            return "X"
+    return ""
+
+
+# -------------------- Tests --------------------
+def test_corpus_cubre_varias_letras():
+    labels = {classify_letter_reference(h, W, H, s, wy) for h, s, wy in landmark_corpus()}
+    assert len(labels - {""}) >= 12
+
+
+def test_classify_letter_equivale_a_la_cascada_original():
+    for hand, scale_h, wrist_y in landmark_corpus():
+        assert classify_letter(hand, W, H, scale_h, wrist_y) == classify_letter_reference(hand, W, H, scale_h, wrist_y)
+
+
+def test_landmarks_to_px_igual_a_lm_px():
+    hand, _, _ = landmark_corpus(n=2)[1]
+    px = landmarks_to_px(hand, W, H)
+    assert px.shape == (21, 2)
+    assert [tuple(p) for p in px.tolist()] == [lm_px(hand, i, W, H) for i in range(21)]
+
+
+def test_hand_features_escalar_y_lote_coinciden():
+    corpus = landmark_corpus(n=50)
+    pts = np.stack([landmarks_to_px(h, W, H) for h, _, _ in corpus])
+    scales = np.array([s for _, s, _ in corpus])
+    wrists = np.array([wy for _, _, wy in corpus])
+    batch = hand_features(pts, scales, wrists)
+    for i, (h, s, wy) in enumerate(corpus):
+        single = hand_features(pts[i], s, wy)
+        for name, value in single._asdict().items():
+            # arccos de numpy puede diferir en el último bit respecto de math.acos
+            assert np.isclose(getattr(batch, name)[i], value, rtol=1e-12, atol=0), name
+        assert classify_features(single) == classify_letter_reference(h, W, H, s, wy)
+
+
+def test_classify_batch_igual_a_classify_letter():
+    corpus = landmark_corpus()
+    lms = np.array([[(lm.x, lm.y, lm.z) for lm in h.landmark] for h, _, _ in corpus])
+    labels = classify_batch(lms, W, H)
+    assert labels.shape == (len(corpus),)
+    assert labels.tolist() == [classify_letter(h, W, H, s, wy) for h, s, wy in corpus]
+
+
+def test_classify_batch_lote_vacio():
+    assert classify_batch(np.zeros((0, 21, 3)), W, H).shape == (0,)
+
+
+def _classify_cascade(f):
+    """Recorre LETTER_RULES completo, regla por regla (sin tabla)."""
+    fingers = [f.idx_ext, f.mid_ext, f.rng_ext, f.pky_ext, f.thb_ext]
+    for letter, pattern, cond in LETTER_RULES:
+        if all(c == "-" or (c == "1") == bool(v) for c, v in zip(pattern, fingers)) and (cond is None or cond(f)):
+            return letter
+    return ""
+
+
+def test_tabla_de_reglas_equivale_a_la_cascada():
+    for hand, scale_h, wrist_y in landmark_corpus():
+        f = hand_features(landmarks_to_px(hand, W, H), scale_h, wrist_y)
+        expected = classify_letter_reference(hand, W, H, scale_h, wrist_y)
+        assert _classify_cascade(f) == expected
+        assert classify_features(f) == expected
+
+
+def test_tabla_de_reglas_respeta_el_orden():
+    order = [letter for letter, _, _ in LETTER_RULES]
+    table = build_rule_table(_RULES)
+    assert len(table) == 32
+    for candidates in table:
+        letters = [letter for letter, _ in candidates]
+        assert letters == sorted(letters, key=order.index)
+        assert "O" in letters  # la O no depende de los dedos
+
+
+def test_inference_view_reduce_manteniendo_aspecto():
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    assert inference_view(frame, 640).shape == (360, 640, 3)
+    assert inference_view(frame, None) is frame
+    assert inference_view(frame, 4000) is frame
+
+
+def test_frame_sin_reconocer_dibuja_roi_y_conserva_el_trazo():
+    engine = LetterEngine(cam_w=W, cam_h=H, use_mediapipe=False)
+    frame = np.zeros((H, W, 3), np.uint8)
+    engine.process_frame(frame, now=0.0, recognize=False)
+    engine.z_roi_active = True
+    engine.z_roi_points[:] = [(100, 100), (140, 100)]
+    engine.last_pinky.extend([(10, 10), (12, 14)])
+    engine.z_detection_status, engine.z_last_detection_time = "success", 1.0
+
+    _, image = engine.process_frame(frame, now=1.5, recognize=False)   # cooldown de PLAY
+    x1, y1, x2, y2 = engine.z_roi_bounds
+    assert image[y1, x1:x2].any()                                       # el ROI sigue en pantalla
+    assert engine.z_roi_active and len(engine.z_roi_points) == 2 and len(engine.last_pinky) == 2
+    assert engine.z_detection_status == "success"
+
+
+def test_frame_pool_recicla_buffers():
+    pool = FramePool(max_free=2)
+    a = pool.acquire((4, 4, 3))
+    pool.release(a)
+    assert pool.acquire((4, 4, 3)) is a
+    pool.release(a)
+    b = pool.acquire((8, 8, 3))  # otro tamaño: se descarta el viejo y se crea uno nuevo
+    assert b is not a and b.shape == (8, 8, 3)
+    assert pool.allocated == 2
+
+
+def _debounce_reference(recent):
+    """Debouncer original: recuenta la ventana entera en cada frame."""
+    candidates = [x for x in recent if x]
+    if not candidates:
+        return ""
+    return max(set(candidates), key=candidates.count)
+
+
+def test_debouncer_incremental_igual_al_recuento_completo():
+    rng = random.Random(5)
+    for window in (1, 7, 30, 60):
+        deb = Debouncer(window=window)
+        recent = collections.deque(maxlen=window)
+        for _ in range(3000):
+            label = rng.choice("AAABBC") if rng.random() < 0.8 else ""
+            recent.append(label)
+            got = deb.push(label)
+            counts = collections.Counter(x for x in recent if x)
+            top = counts.most_common(2)
+            if len(top) < 2 or top[0][1] > top[1][1]:  # moda única: tiene que coincidir
+                assert got == _debounce_reference(recent)
+            else:                                      # empate: alguna de las empatadas
+                assert counts[got] == top[0][1]
+
+
+def test_debouncer_empate_mantiene_la_actual():
+    deb = Debouncer(window=4)
+    assert [deb.push(x) for x in "AABB"] == ["A", "A", "A", "A"]
+    assert deb.push("B") == "B"      # sale una A: B 3 a 1
+    deb.reset()
+    assert deb.push("") == "" and deb.push("C") == "C"
+
+
+def test_debouncer_con_decaimiento_favorece_votos_recientes():
+    deb = Debouncer(window=60, decay=0.8)
+    for x in "AAAAAAAAAA":
+        deb.push(x)
+    assert [deb.push("B") for _ in range(4)][-1] == "B"   # 4 B recientes pesan más que 10 A viejas
+    for _ in range(2000):                                  # fuerza renormalizaciones de la escala
+        deb.push("C")
+    assert deb.push("D", weight=0.5) == "C"